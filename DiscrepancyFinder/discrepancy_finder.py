@@ -1,5 +1,24 @@
+import os
+import numpy as np
 import pandas as pd
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+# Rust-based reader, parses .xlsx several times faster than openpyxl
+EXCEL_ENGINE = "calamine"
+
+# Arrow-backed strings hash and compare in C and take about half the memory
+# of Python str objects
+STRING_DTYPE = "string[pyarrow]"
+
+# Below this many rows a plain dict scan beats the NumPy kernel's setup cost
+SMALL_SHEET_ROWS = 2_000
+
+
+class MissingColumnsError(ValueError):
+    """
+    Raised when a sheet lacks one or more of the selected columns.
+    """
 
 
 class DiscrepancyFinder:
@@ -8,10 +27,135 @@ class DiscrepancyFinder:
     with identical 'UID' values.
     """
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str | None = None):
         self.file_path = file_path
-        logging.info(f"DiscrepancyFinder initialized with file: {
-                     self.file_path}")
+        self._excel_file = None
+        self._frame = None
+        if file_path is not None:
+            logging.info(f"DiscrepancyFinder initialized with file: {
+                         self.file_path}")
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "DiscrepancyFinder":
+        """
+        Creates a finder over an already loaded sheet, skipping any Excel reads.
+
+        :param df: The sheet contents as read by `pd.read_excel`.
+        :return: A DiscrepancyFinder that searches `df`. It has no workbook, so
+            only `get_discrepancies` can be used.
+        """
+        finder = cls()
+        finder._frame = df
+        return finder
+
+    @property
+    def excel_file(self) -> pd.ExcelFile:
+        """
+        Opened workbook, shared by all reads of this file.
+
+        :return: The cached ExcelFile for `file_path`.
+        :raises ValueError: If the finder was created from a frame.
+        """
+        if self.file_path is None:
+            raise ValueError("DiscrepancyFinder created from a frame has no workbook to read")
+        if self._excel_file is None:
+            self._excel_file = pd.ExcelFile(self.file_path, engine=EXCEL_ENGINE)
+        return self._excel_file
+
+    def close(self):
+        """
+        Releases the opened workbook, if any.
+        """
+        if self._excel_file is not None:
+            self._excel_file.close()
+            self._excel_file = None
+
+    def read_columns(self, sheet_name: str, columns: list[str]) -> pd.DataFrame:
+        """
+        Reads only the given columns of a sheet as strings.
+
+        Other columns are skipped while parsing, so memory grows with the number of
+        requested columns rather than with the width of the sheet. Requested columns
+        missing from the sheet are left out of the result.
+
+        :param sheet_name: The name of the Excel sheet to read.
+        :param columns: Names of the columns to read.
+        :return: DataFrame holding the found columns.
+        """
+        wanted = set(columns)
+        return pd.read_excel(self.excel_file, sheet_name=sheet_name,
+                             usecols=lambda column: column in wanted,
+                             dtype={column: STRING_DTYPE for column in columns})
+
+    @staticmethod
+    def _scan_discrepant_rows(keys: pd.Series, values_1: pd.Series, values_2: pd.Series, rows: np.ndarray):
+        """
+        Same result as `_find_discrepant_rows`, computed with one pass over the rows
+        and a dict of groups, which is cheaper for small sheets.
+
+        :param keys: Values to group by.
+        :param values_1: First column to compare.
+        :param values_2: Second column to compare.
+        :param rows: Excel row number of each value.
+        :return: List of tuples representing rows with discrepancies.
+        """
+        # key -> [first value 1, first value 2, row numbers, has discrepancy]
+        groups = {}
+        for key, value_1, value_2, row in zip(keys.tolist(), values_1.tolist(), values_2.tolist(), rows.tolist()):
+            group = groups.get(key)
+            if group is None:
+                groups[key] = [value_1, value_2, [row], False]
+            else:
+                group[2].append(row)
+                if value_1 != group[0] or value_2 != group[1]:
+                    group[3] = True
+
+        discrepancies = []
+        for _, _, group_rows, has_discrepancy in groups.values():
+            if has_discrepancy:
+                discrepancies.extend([(group_rows[0], row) for row in group_rows[1:]])
+        return discrepancies
+
+    @staticmethod
+    def _find_discrepant_rows(keys: pd.Series, values_1: pd.Series, values_2: pd.Series, rows: np.ndarray):
+        """
+        Pairs the first row of every group holding more than one distinct value in
+        either compared column with each of the group's other rows.
+
+        Groups are formed once by a stable sort of the integer-coded keys, so rows
+        keep their sheet order inside a group and groups come in order of first
+        appearance. Comparing every row's combined value code with its group's
+        first one and reducing per segment with `np.logical_or.reduceat` flags
+        the offending groups without any per-group Python work.
+
+        :param keys: Values to group by.
+        :param values_1: First column to compare.
+        :param values_2: Second column to compare.
+        :param rows: Excel row number of each value.
+        :return: List of tuples representing rows with discrepancies.
+        """
+        if len(keys) == 0:
+            return []
+
+        key_codes = pd.factorize(keys)[0]
+        order = np.argsort(key_codes, kind='stable')
+        sorted_keys = key_codes[order]
+        starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+        lengths = np.diff(np.append(starts, len(order)))
+        first = np.repeat(starts, lengths)  # Position of each row's group leader
+
+        # Encode both compared values as one integer so a single comparison per
+        # row tells whether it matches its leader in either column
+        codes_1 = pd.factorize(values_1)[0].astype(np.int64)
+        codes_2, uniques_2 = pd.factorize(values_2)
+        pair_codes = (codes_1 * len(uniques_2) + codes_2)[order]
+        differs = pair_codes != pair_codes[first]
+        bad = np.repeat(np.logical_or.reduceat(differs, starts), lengths)
+
+        # Every non-leading row of an offending group pairs with its leader
+        bad[starts] = False
+        sorted_rows = rows[order]
+        return list(zip(sorted_rows[first[bad]].tolist(), sorted_rows[bad].tolist()))
 
     def get_discrepancies(self, sheet_name: str, group_by: str, compare_1: str, compare_2: str):
         """
@@ -27,30 +171,25 @@ class DiscrepancyFinder:
             logging.info(f"Processing sheet '{sheet_name}' with group_by='{
                          group_by}', compare_1='{compare_1}', compare_2='{compare_2}'.")
 
-            # Load Excel sheet
-            df = pd.read_excel(self.file_path, sheet_name=sheet_name)
+            if self._frame is not None:
+                df = self._frame
+            else:
+                df = self.read_columns(sheet_name, [group_by, compare_1, compare_2])
 
             # Ensure selected columns exist
             required_columns = {group_by, compare_1, compare_2}
             if not required_columns.issubset(df.columns):
-                raise ValueError(f"One or more selected columns do not exist in the sheet: {
+                raise MissingColumnsError(f"One or more selected columns do not exist in the sheet: {
                                  required_columns}")
 
             # Select and clean up relevant columns
             df = df[[group_by, compare_1, compare_2]].dropna()
-            df = df.astype(str)  # Convert all to strings for uniformity
+            df = df.astype(STRING_DTYPE)  # No-op for sheets read above, needed for frames
 
             # Find discrepancies
-            discrepancies = []
-            grouped = df.groupby(group_by, dropna=False)
-
-            for key, group in grouped:
-                compare_1_values = group[compare_1].unique()
-                compare_2_values = group[compare_2].unique()
-
-                if len(compare_1_values) > 1 or len(compare_2_values) > 1:
-                    rows = group.index + 2  # Excel rows start at 1
-                    discrepancies.extend([(rows[0], row) for row in rows[1:]])
+            rows = df.index.to_numpy() + 2  # Excel rows start at 1
+            find = self._scan_discrepant_rows if len(df) < SMALL_SHEET_ROWS else self._find_discrepant_rows
+            discrepancies = find(df[group_by], df[compare_1], df[compare_2], rows)
 
             logging.info(f"Found {len(discrepancies)
                                   } discrepancies in sheet '{sheet_name}'.")
@@ -59,3 +198,34 @@ class DiscrepancyFinder:
         except Exception as e:
             logging.exception("Error in discrepancy finding")
             raise
+
+    def get_discrepancies_all_sheets(self, group_by: str, compare_1: str, compare_2: str):
+        """
+        Finds discrepancies in every sheet of the workbook, processing sheets in parallel.
+
+        :param group_by: The column name to group by (e.g., 'UID').
+        :param compare_1: The first column to compare for discrepancies.
+        :param compare_2: The second column to compare for discrepancies.
+        :return: Dict mapping each sheet name to its list of discrepancy tuples. Sheets
+            lacking any of the selected columns are left out.
+        """
+        sheet_names = self.excel_file.sheet_names
+
+        def process_sheet(sheet_name):
+            # A calamine workbook must not be read from several threads at once,
+            # so every worker opens its own handle to the file
+            finder = DiscrepancyFinder(self.file_path)
+            try:
+                return finder.get_discrepancies(sheet_name, group_by, compare_1, compare_2)
+            except MissingColumnsError:
+                logging.warning(f"Sheet '{sheet_name}' skipped: the selected columns are missing.")
+                return None
+            finally:
+                finder.close()
+
+        max_workers = max(1, min(len(sheet_names), os.cpu_count() or 1))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(process_sheet, sheet_names)
+            return {sheet_name: discrepancies
+                    for sheet_name, discrepancies in zip(sheet_names, results)
+                    if discrepancies is not None}
@@ -19,7 +19,7 @@ def setup_logging():
         log_folder, f"log_{datetime.now().strftime('%d.%m.%Y_%H-%M-%S')}.log")
     logging.basicConfig(
         filename=log_filename,
-        level=logging.DEBUG,
+        level=logging.INFO,
         format="%(asctime)s - %(levelname)s - %(message)s",
     )
     logging.info("Logging initialized.")
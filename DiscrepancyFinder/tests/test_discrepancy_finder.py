@@ -0,0 +1,116 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+# Add project root to sys.path
+root_path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, root_path)
+
+from discrepancy_finder import DiscrepancyFinder, SMALL_SHEET_ROWS
+
+# Rows with a NaN in one of the compared columns, dropped before the search
+NAN_ROWS = 10
+
+
+def make_sheet(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Random sheet with repeated UIDs, occasional discrepancies and NaNs."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "UID": rng.integers(0, rows // 4, rows).astype(str).astype(object),
+        "MATERIAL": rng.choice(["steel", "alu"], rows, p=[0.97, 0.03]).astype(object),
+        "WEIGHT (KG)": rng.choice([1.5, 2.0], rows, p=[0.98, 0.02]),
+    })
+    nan_rows = rng.choice(rows, NAN_ROWS, replace=False)
+    for i, column in zip(nan_rows, ["UID", "MATERIAL", "WEIGHT (KG)"] * NAN_ROWS):
+        df.loc[i, column] = np.nan
+    return df
+
+
+def groupby_discrepancies(df: pd.DataFrame) -> list:
+    """The original groupby search, with groups in order of first appearance."""
+    df = df[["UID", "MATERIAL", "WEIGHT (KG)"]].dropna().astype(str)
+    discrepancies = []
+    for _, group in df.groupby("UID", sort=False):
+        if group["MATERIAL"].nunique() > 1 or group["WEIGHT (KG)"].nunique() > 1:
+            rows = (group.index + 2).tolist()
+            discrepancies.extend((rows[0], row) for row in rows[1:])
+    return discrepancies
+
+
+@pytest.mark.parametrize("rows, kernel", [
+    (SMALL_SHEET_ROWS - 1 + NAN_ROWS, "_scan_discrepant_rows"),
+    (SMALL_SHEET_ROWS + NAN_ROWS, "_find_discrepant_rows"),
+    (5 * SMALL_SHEET_ROWS, "_find_discrepant_rows"),
+])
+def test_kernels_match_groupby(rows, kernel):
+    """Both kernels give the groupby result, each on its side of SMALL_SHEET_ROWS."""
+    df = make_sheet(rows)
+    expected = groupby_discrepancies(df)
+    assert expected  # The sheet has discrepancies to find
+
+    with patch.object(DiscrepancyFinder, kernel,
+                      wraps=getattr(DiscrepancyFinder, kernel)) as used_kernel:
+        result = DiscrepancyFinder.from_frame(df).get_discrepancies("Sheet", "UID", "MATERIAL", "WEIGHT (KG)")
+
+    used_kernel.assert_called_once()
+    assert result == expected
+    assert all(type(row) is int for pair in result for row in pair)
+
+
+@pytest.mark.parametrize("kernel", ["_scan_discrepant_rows", "_find_discrepant_rows"])
+def test_kernels_keep_first_appearance_order(kernel):
+    """Groups come in order of first appearance, rows in sheet order within a group."""
+    df = pd.DataFrame({
+        "UID": ["b", "a", None, "b", "a", "c", "b"],
+        "MATERIAL": ["x", "x", "y", "y", "x", "x", "x"],
+        "WEIGHT (KG)": ["1", "1", "1", "1", "2", "1", "1"],
+    })
+    df = df.dropna().astype("string[pyarrow]")
+    rows = df.index.to_numpy() + 2
+
+    result = getattr(DiscrepancyFinder, kernel)(df["UID"], df["MATERIAL"], df["WEIGHT (KG)"], rows)
+
+    assert result == [(2, 5), (2, 8), (3, 6)]
+
+
+def test_all_sheets_skip_sheets_without_columns(tmp_path):
+    """Sheets lacking the selected columns are left out, the others are still searched."""
+    file_path = tmp_path / "mixed.xlsx"
+    with pd.ExcelWriter(file_path) as writer:
+        pd.DataFrame({
+            "UID": ["1", "1", "2", "2"],
+            "MATERIAL": ["steel", "alu", "steel", "steel"],
+            "WEIGHT (KG)": ["1.5", "1.5", "2.0", "2.0"],
+        }).to_excel(writer, sheet_name="Parts", index=False)
+        pd.DataFrame({
+            "UID": ["1", "1"],
+            "NOTE": ["a", "b"],
+        }).to_excel(writer, sheet_name="Notes", index=False)
+        pd.DataFrame({
+            "UID": ["3", "3"],
+            "MATERIAL": ["alu", "alu"],
+            "WEIGHT (KG)": ["1.0", "3.0"],
+        }).to_excel(writer, sheet_name="Spares", index=False)
+
+    finder = DiscrepancyFinder(str(file_path))
+    try:
+        result = finder.get_discrepancies_all_sheets("UID", "MATERIAL", "WEIGHT (KG)")
+    finally:
+        finder.close()
+
+    assert result == {"Parts": [(2, 3)], "Spares": [(2, 3)]}
+
+
+def test_frame_finder_has_no_workbook():
+    """A finder over a loaded sheet searches it, but refuses the workbook-only methods."""
+    df = pd.DataFrame({"UID": ["1", "1"], "MATERIAL": ["a", "b"], "WEIGHT (KG)": ["1", "1"]})
+    finder = DiscrepancyFinder.from_frame(df)
+
+    assert finder.get_discrepancies("Sheet", "UID", "MATERIAL", "WEIGHT (KG)") == [(2, 3)]
+    with pytest.raises(ValueError, match="no workbook"):
+        finder.read_columns("Sheet", ["UID"])
+    with pytest.raises(ValueError, match="no workbook"):
+        finder.get_discrepancies_all_sheets("UID", "MATERIAL", "WEIGHT (KG)")
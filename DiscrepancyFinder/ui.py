@@ -1,25 +1,39 @@
+import os
 import sys
 import logging
+import tempfile
 from discrepancy_finder import DiscrepancyFinder
-from pandas import ExcelFile, read_excel
+from pandas import DataFrame, read_excel
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QLabel, QVBoxLayout,
     QWidget, QComboBox, QTextEdit, QFileDialog, QHBoxLayout
 )
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QDragEnterEvent, QDropEvent, QIcon
+from PyQt5.QtCore import Qt, QUrl
+from PyQt5.QtGui import QCloseEvent, QDesktopServices, QDragEnterEvent, QDropEvent, QIcon
+
+# Longer result lists are written to a file instead of the results box
+MAX_DISPLAYED_DISCREPANCIES = 10_000
 
 
 class DiscrepancyFinderWindow(QMainWindow):
+    # Shared by all windows, the icon is loaded from disk on first use
+    _ICON = None
+    _LABEL_STYLE = "QLabel { border: 2px dashed #aaa; font-size: 14px; padding: 20px; }"
+    _CLEAR_BUTTON_STYLE = "QPushButton { color: red; font-size: 16px; }"
+
     def __init__(self):
         super().__init__()
         logging.info("Initializing DiscrepancyFinderWindow UI.")
-        self.setWindowIcon(QIcon("images/icon.png"))
+        if DiscrepancyFinderWindow._ICON is None:
+            DiscrepancyFinderWindow._ICON = QIcon("images/icon.png")
+        self.setWindowIcon(DiscrepancyFinderWindow._ICON)
         self.setWindowTitle("Discrepancy Finder")
         self.setGeometry(300, 150, 450, 500)
         self.file_path = None
         self.validator = None
         self.columns = []
+        self._sheet_cache: dict[tuple[str, ...], DataFrame] = {}
+        self._workbook_sheetnames: list[str] = []
 
         layout = QVBoxLayout()
 
@@ -27,15 +41,13 @@ class DiscrepancyFinderWindow(QMainWindow):
         file_layout = QHBoxLayout()
         self.label = QLabel("Drag and drop your Excel file here", self)
         self.label.setAlignment(Qt.AlignCenter)
-        self.label.setStyleSheet(
-            "QLabel { border: 2px dashed #aaa; font-size: 14px; padding: 20px; }")
+        self.label.setStyleSheet(self._LABEL_STYLE)
         self.label.mousePressEvent = self.open_file_dialog  # Handle manual file selection
         file_layout.addWidget(self.label)
 
         self.clear_button = QPushButton("✖", self)  # Clear button
         self.clear_button.setFixedSize(30, 30)
-        self.clear_button.setStyleSheet(
-            "QPushButton { color: red; font-size: 16px; }")
+        self.clear_button.setStyleSheet(self._CLEAR_BUTTON_STYLE)
         self.clear_button.clicked.connect(self.clear_file)
         self.clear_button.setVisible(False)
         file_layout.addWidget(self.clear_button)
@@ -44,6 +56,7 @@ class DiscrepancyFinderWindow(QMainWindow):
 
         # Sheet selector
         self.sheet_combo = QComboBox(self)
+        self.sheet_combo.currentIndexChanged.connect(self.load_columns)
         layout.addWidget(QLabel("Select a sheet:", self))
         layout.addWidget(self.sheet_combo)
 
@@ -70,6 +83,13 @@ class DiscrepancyFinderWindow(QMainWindow):
         self.results_text.setReadOnly(True)
         layout.addWidget(self.results_text)
 
+        # Opens results that were too long to display
+        self.results_path = None
+        self.open_results_button = QPushButton("Open Results", self)
+        self.open_results_button.clicked.connect(self.open_results)
+        self.open_results_button.setVisible(False)
+        layout.addWidget(self.open_results_button)
+
         # Set main widget and layout
         main_widget = QWidget()
         main_widget.setLayout(layout)
@@ -111,22 +131,34 @@ class DiscrepancyFinderWindow(QMainWindow):
 
     def clear_file(self):
         self.file_path = None
+        if self.validator is not None:
+            self.validator.close()
+            self.validator = None
+        self._sheet_cache.clear()
+        self._workbook_sheetnames = []
+        self.columns = []
         self.label.setText("Drag and drop your Excel file here")
         self.sheet_combo.clear()
         self.group_by_combo.clear()
         self.compare_1_combo.clear()
         self.compare_2_combo.clear()
         self.results_text.clear()
+        self.remove_results_file()
         self.clear_button.setVisible(False)
         logging.info("File cleared by user.")
 
     def load_sheets(self):
         try:
-            excel_file = ExcelFile(self.file_path)
+            if self.validator is not None:
+                self.validator.close()
+            self._sheet_cache.clear()
+            # Opened once here and reused for columns and discrepancy search
+            self.validator = DiscrepancyFinder(self.file_path)
+            # calamine reads only the workbook directory here, no sheet data
+            self._workbook_sheetnames = self.validator.excel_file.sheet_names
             self.sheet_combo.clear()
-            self.sheet_combo.addItems(excel_file.sheet_names)
-            self.sheet_combo.currentIndexChanged.connect(self.load_columns)
-            logging.info(f"Sheets loaded: {excel_file.sheet_names}")
+            self.sheet_combo.addItems(self._workbook_sheetnames)
+            logging.info(f"Sheets loaded: {self._workbook_sheetnames}")
         except Exception as e:
             logging.exception("Error loading sheets: %s", e)
             self.label.setText(f"Error loading file")
@@ -134,15 +166,28 @@ class DiscrepancyFinderWindow(QMainWindow):
     def load_columns(self):
         try:
             sheet_name = self.sheet_combo.currentText()
-            df = read_excel(self.file_path, sheet_name=sheet_name)
-            self.columns = df.columns.tolist()
-            self.group_by_combo.clear()
-            self.compare_1_combo.clear()
-            self.compare_2_combo.clear()
-
-            self.group_by_combo.addItems(self.columns)
-            self.compare_1_combo.addItems(self.columns)
-            self.compare_2_combo.addItems(self.columns)
+            if self.validator is None or not sheet_name:
+                return  # Sheet list was cleared
+
+            # Only the header is needed here, the sheet body is read on search
+            df = read_excel(self.validator.excel_file, sheet_name=sheet_name, nrows=0)
+            columns = df.columns.tolist()
+            if columns == self.columns:
+                return  # Same header, keep the current selections
+
+            self.columns = columns
+            combos = (self.group_by_combo, self.compare_1_combo, self.compare_2_combo)
+
+            # Repopulate without intermediate repaints or change notifications
+            self.setUpdatesEnabled(False)
+            try:
+                for combo in combos:
+                    combo.blockSignals(True)
+                    combo.clear()
+                    combo.addItems(self.columns)
+                    combo.blockSignals(False)
+            finally:
+                self.setUpdatesEnabled(True)
 
             logging.info(f"Columns loaded for sheet '{
                          sheet_name}': {self.columns}")
@@ -160,7 +205,7 @@ class DiscrepancyFinderWindow(QMainWindow):
         compare_2 = self.compare_2_combo.currentText()
 
         if not all([sheet_name, group_by, compare_1, compare_2, self.file_path]):
-            self.results_text.setText(
+            self.results_text.setPlainText(
                 "Please load a file, select a sheet, and choose columns.")
             logging.warning("Incomplete input for discrepancy finding.")
             return
@@ -168,25 +213,67 @@ class DiscrepancyFinderWindow(QMainWindow):
         try:
             logging.info(f"Finding discrepancies in sheet '{sheet_name}' with group_by='{
                 group_by}', compare_1='{compare_1}', compare_2='{compare_2}'.")
-            self.validator = DiscrepancyFinder(self.file_path)
+            if self.validator is None:
+                self.validator = DiscrepancyFinder(self.file_path)
+
+            # Read only the selected columns, repeated searches reuse the parsed frame
+            key = (sheet_name, group_by, compare_1, compare_2)
+            if key not in self._sheet_cache:
+                self._sheet_cache[key] = self.validator.read_columns(
+                    sheet_name, [group_by, compare_1, compare_2])
 
             # Get discrepancies
-            discrepancies = self.validator.get_discrepancies(
+            discrepancies = DiscrepancyFinder.from_frame(self._sheet_cache[key]).get_discrepancies(
                 sheet_name, group_by, compare_1, compare_2)
 
-            # Display results
+            # Display results, the file of the previous search is not needed anymore
+            self.remove_results_file()
             if discrepancies:
                 result_text = "Discrepancies found between rows:\n"
                 result_text += "\n".join(f"{pair[0]
                                             } - {pair[1]}" for pair in discrepancies)
+
+                if len(discrepancies) > MAX_DISPLAYED_DISCREPANCIES:
+                    with tempfile.NamedTemporaryFile("w", encoding="utf-8", prefix="discrepancies_",
+                                                     suffix=".txt", delete=False) as results_file:
+                        results_file.write(result_text)
+                    self.results_path = results_file.name
+                    result_text = f"Found {len(discrepancies)} discrepancies. Results written to {self.results_path}"
+                    self.open_results_button.setVisible(True)
+                    logging.info(f"Results written to {self.results_path}")
             else:
                 result_text = "No discrepancies found."
 
-            self.results_text.setText(result_text)
+            # Plain text skips the rich-text layout, which is slow on long lists
+            self.results_text.setPlainText(result_text)
             logging.info("Discrepancy finding completed successfully.")
         except Exception as e:
             logging.exception("Error finding discrepancies")
-            self.results_text.setText(f"Error processing sheet: {e}")
+            self.results_text.setPlainText(f"Error processing sheet: {e}")
+
+    def open_results(self):
+        """
+        Opens the file with the last written results in the default viewer.
+        """
+        if self.results_path:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(self.results_path))
+
+    def remove_results_file(self):
+        """
+        Deletes the file with the last written results, if any.
+        """
+        self.open_results_button.setVisible(False)
+        if self.results_path:
+            try:
+                os.remove(self.results_path)
+            except OSError:
+                # E.g. still opened in a viewer on Windows, it stays in the temp directory
+                logging.warning(f"Could not delete results file {self.results_path}")
+            self.results_path = None
+
+    def closeEvent(self, event: QCloseEvent):
+        self.remove_results_file()
+        super().closeEvent(event)
 
 
 def main():
@@ -1,8 +1,23 @@
 # core/__init__.py
 
-from .gas_flow_regulator import __all__ as gfr_all
-from .relay import __all__ as relay_all
-from .utils import __all__ as utils_all
-from .yaml_config_loader import __all__ as yaml_config_loader_all
+import importlib
+
+# The subpackages are imported on first access (PEP 562), so importing one of
+# them, e.g. core.gas_flow_regulator, doesn't import all the others as well
+_SUBPACKAGE_ALL = {
+    "gfr_all": ".gas_flow_regulator",
+    "relay_all": ".relay",
+    "utils_all": ".utils",
+    "yaml_config_loader_all": ".yaml_config_loader",
+}
 
 __all__ = ["gfr_all", "relay_all", "utils_all", "yaml_config_loader_all"]
+
+
+def __getattr__(name):
+    if name not in _SUBPACKAGE_ALL:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = importlib.import_module(_SUBPACKAGE_ALL[name], __name__).__all__
+    globals()[name] = value
+    return value
@@ -1,10 +1,13 @@
-import io
-import sys
-from time import sleep
+from time import monotonic, sleep
 from typing import Optional
-from struct import pack, unpack
 from pymodbus.client.sync import ModbusSerialClient
-from core.utils import modbus_operation, get_last_error, MODBUS_OK, MODBUS_ERROR
+from core.utils import (
+    modbus_operation,
+    retry_with_backoff,
+    capture_pymodbus_error,
+    MODBUS_OK,
+    MODBUS_ERROR,
+)
 
 
 class GFRController:
@@ -13,18 +16,44 @@ class GFRController:
     MODBUS_REGISTER_FLOW = 2103
     MODBUS_REGISTER_GAS = 2100
 
+    # Pause between closing the port and opening it again [s]
+    REOPEN_DELAY = 0.5
+
+    # Moment of the last _close() by time.monotonic()
+    _last_close_monotonic = 0.0
+
     def __init__(self):
         self._gfr: Optional[ModbusSerialClient] = None
         self.slave_id = 1
 
-    def _init(self, port, baudrate, parity, data_bit, stop_bit, slave_id, timeout):
-        old_stderr = sys.stderr
-        error_buffer = io.StringIO()
-        original_error_message = ""
+        # Message of the last failed operation of this device, set by modbus_operation
+        self._last_error = ""
 
-        try:
-            sleep(0.5)
+        # Flow reading function made by _make_flow_reader and its client
+        self._flow_reader = None
+        self._flow_reader_client = None
+
+    def _init(
+        self,
+        port,
+        baudrate,
+        parity,
+        data_bit,
+        stop_bit,
+        slave_id,
+        timeout,
+        inter_byte_timeout=None,
+    ):
+        # The adapter may need a moment to release the port after closing,
+        # there is no reason to wait if it was closed long enough ago
+        elapsed = monotonic() - self._last_close_monotonic
+        if elapsed < self.REOPEN_DELAY:
+            sleep(self.REOPEN_DELAY - elapsed)
+
+        if inter_byte_timeout is not None:
+            inter_byte_timeout /= 1000  # Seconds, like the client timeout
 
+        try:
             self._gfr = ModbusSerialClient(
                 port=port,
                 baudrate=baudrate,
@@ -36,48 +65,66 @@ class GFRController:
         except Exception as e:
             raise Exception(f"Не удалось подключиться к РРГ: {e}")
 
-        sleep(0.2)
         self._set_slave(slave_id)
 
         connect_attempts = 3
-        for attempt in range(connect_attempts):
-            sys.stderr = error_buffer
-
-            try:
-                if self._gfr.connect():
-                    sys.stderr = old_stderr
-                    return
-            except Exception as e:
-                original_error_message = str(e)
-
-            stderr_output = error_buffer.getvalue()
-            if stderr_output and not original_error_message:
-                original_error_message = stderr_output.strip()
-
-            error_buffer.truncate(0)
-            error_buffer.seek(0)
-
-            sleep(0.5)
+        with capture_pymodbus_error() as pymodbus_error:
+            connected, original_error_message = retry_with_backoff(
+                self._gfr.connect, attempts=connect_attempts
+            )
+        if connected:
+            if inter_byte_timeout is not None:
+                # Stop reading once the line goes quiet, so a response shorter
+                # than expected (e.g. a Modbus exception) doesn't wait for the
+                # whole timeout. Too small a value can split a slow frame
+                self._gfr.socket.inter_byte_timeout = inter_byte_timeout
+            return
 
-        sys.stderr = old_stderr
+        self._gfr.close()
+        self._gfr = None
 
         error_message = (
             f"Не удалось подключиться к РРГ после {connect_attempts} попыток"
         )
+        # connect() returns False rather than raising when the port can't be opened,
+        # the reason is only logged by pymodbus
+        original_error_message = original_error_message or pymodbus_error.last
+        if original_error_message:
+            error_message += f": {original_error_message}"
         raise Exception(error_message)
 
     @modbus_operation("РРГ: Закрытие соединения с устройством", "self._gfr")
     def _close(self):
         self._gfr.close()  # type: ignore[checking on None in wrapper]
         self._gfr = None
+        self._last_close_monotonic = monotonic()
 
-    @modbus_operation("РРГ: Установка Slave", "self._gfr", skip_device_check=True)
     def _set_slave(self, slave_id):
         self.slave_id = slave_id
+        self._flow_reader_client = None
 
     @modbus_operation("РРГ: Включение", "self._gfr", skip_device_check=True)
-    def TurnOn(self, port, baudrate, parity, data_bit, stop_bit, slave_id, timeout):
-        self._init(port, baudrate, parity, data_bit, stop_bit, slave_id, timeout)
+    def TurnOn(
+        self,
+        port,
+        baudrate,
+        parity,
+        data_bit,
+        stop_bit,
+        slave_id,
+        timeout,
+        inter_byte_timeout=None,
+    ):
+        self._init(
+            port,
+            baudrate,
+            parity,
+            data_bit,
+            stop_bit,
+            slave_id,
+            timeout,
+            inter_byte_timeout,
+        )
 
     @modbus_operation("РРГ: Выключение", "self._gfr")
     def TurnOff(self):
@@ -117,6 +164,10 @@ class GFRController:
     #         - The high 16 bits: obtained by doing a right-shift (value >> 16)
     #         - The low 16 bits: obtained by masking with 0xFFFF (value & 0xFFFF)
     #
+    #    - The two registers are consecutive, so both are written with a single
+    #      "Write Multiple Registers" request (function code 16): one round-trip,
+    #      and the device never sees a half-updated setpoint.
+    #
     #    - In our example, since 25000 is less than 65536 (2^16),
     #      the high 16 bits are 0 and the low 16 bits are 25000.
     #      For larger numbers the high bits would carry a non-zero value.
@@ -157,11 +208,12 @@ class GFRController:
         value = (int)(
             setpoint * 1000
         )  # Convert setpoint to an integer with three decimal places.
-        reg_high = value >> 16  # Extract the upper 16 bits (shift right by 16).
-        reg_low = value & 0xFFFF  # Extract the lower 16 bits (mask with 0xFFFF).
+        # Split the two's complement 32-bit value into the upper and lower 16 bits
+        # (the mask keeps the upper word of a negative value within 0..0xFFFF)
+        reg_high, reg_low = divmod(value & 0xFFFFFFFF, 0x10000)
 
-        self._gfr.write_register(self.MODBUS_REGISTER_SETPOINT_HIGH, reg_high, slave=self.slave_id)  # type: ignore[checking on None in wrapper]
-        self._gfr.write_register(self.MODBUS_REGISTER_SETPOINT_LOW, reg_low, slave=self.slave_id)  # type: ignore[checking on None in wrapper]
+        # The registers are consecutive, write both in a single transaction
+        self._gfr.write_registers(self.MODBUS_REGISTER_SETPOINT_HIGH, [reg_high, reg_low], slave=self.slave_id)  # type: ignore[checking on None in wrapper]
 
     @modbus_operation(
         "РРГ: Получение расхода (чтение из регистра " f"{MODBUS_REGISTER_FLOW})",
@@ -169,16 +221,7 @@ class GFRController:
         preserve_return_value=True,
     )
     def GetFlow(self):
-        response = self._gfr.read_holding_registers(address=self.MODBUS_REGISTER_FLOW, count=1, slave=self.slave_id)  # type: ignore[checking on None in wrapper]
-
-        if not hasattr(response, "registers") or not response.registers:
-            return MODBUS_ERROR, 0
-
-        value = response.registers[0]
-        signed_value = unpack(">h", pack(">H", value))[0]
-        flow = signed_value / 10.0
-
-        return MODBUS_OK, flow
+        return self._read_flow()
 
     @modbus_operation(
         "РРГ: Установка газа (запись в регистр " f"{MODBUS_REGISTER_GAS})",
@@ -187,6 +230,16 @@ class GFRController:
     def SetGas(self, gas_id):
         self._gfr.write_register(self.MODBUS_REGISTER_GAS, gas_id, slave=self.slave_id)  # type: ignore[checking on None in wrapper]
 
+    def _read_flow(self):
+        # The reader is bound to the client it was made for and is remade
+        # when the client changes (reconnect) or the slave id is set
+        if self._flow_reader_client is not self._gfr:
+            self._flow_reader = _make_flow_reader(
+                self, self._gfr, self.MODBUS_REGISTER_FLOW, self.slave_id
+            )
+            self._flow_reader_client = self._gfr
+        return self._flow_reader()
+
     def IsConnected(self) -> bool:
         return self._gfr is not None
 
@@ -194,4 +247,39 @@ class GFRController:
         return self._gfr is None
 
     def GetLastError(self) -> str:
-        return get_last_error()
+        return self._last_error
+
+
+def _make_flow_reader(controller, client, address, slave):
+    """
+    Makes a function reading the flow register of the given client.
+
+    GetFlow is called on every poll, so the client method, the register address
+    and the slave id are bound once as closure variables instead of being looked
+    up on the controller each time. The message of a failed read is stored on
+    the controller itself: the read runs in the poller thread, and the global
+    last error may be replaced by another device meanwhile.
+
+    Returns:
+        Function returning (MODBUS_OK, flow) or (MODBUS_ERROR, 0)
+    """
+    read_holding_registers = client.read_holding_registers
+
+    def read_flow():
+        response = read_holding_registers(address=address, count=1, slave=slave)
+
+        # Error responses (ExceptionResponse, ModbusIOException) have no registers
+        try:
+            value = response.registers[0]
+        except (AttributeError, IndexError, TypeError):
+            controller._last_error = (
+                f"РРГ: Получение расхода не удалось. Ответ без данных: {response}"
+            )
+            return MODBUS_ERROR, 0
+
+        signed_value = (value ^ 0x8000) - 0x8000  # uint16 -> int16
+        flow = signed_value / 10.0
+
+        return MODBUS_OK, flow
+
+    return read_flow
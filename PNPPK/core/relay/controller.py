@@ -1,26 +1,40 @@
-import io
-import sys
-from time import sleep
+from time import monotonic, sleep
 from typing import Optional
 from pymodbus.client.sync import ModbusSerialClient
-from core.utils import modbus_operation, get_last_error
+from core.utils import (
+    modbus_operation,
+    retry_with_backoff,
+    capture_pymodbus_error,
+)
 
 
 class RelayController:
+    # Holding register switching the relay (1 - on, 0 - off), written with
+    # "Write Single Register" (function code 6). The board isn't documented to map
+    # it to a coil, and an RTU "Write Single Coil" frame is just as long (8 bytes)
     MODBUS_REGISTER_TURN_ON_OFF = 512
 
+    # Pause between closing the port and opening it again [s]
+    REOPEN_DELAY = 0.5
+
+    # Moment of the last _close() by time.monotonic()
+    _last_close_monotonic = 0.0
+
     def __init__(self):
         self._relay: Optional[ModbusSerialClient] = None
         self.slave_id = 1
 
+        # Message of the last failed operation of this device, set by modbus_operation
+        self._last_error = ""
+
     def _init(self, port, baudrate, parity, data_bit, stop_bit, slave_id, timeout):
-        old_stderr = sys.stderr
-        error_buffer = io.StringIO()
-        original_error_message = ""
+        # The adapter may need a moment to release the port after closing,
+        # there is no reason to wait if it was closed long enough ago
+        elapsed = monotonic() - self._last_close_monotonic
+        if elapsed < self.REOPEN_DELAY:
+            sleep(self.REOPEN_DELAY - elapsed)
 
         try:
-            sleep(0.5)
-
             self._relay = ModbusSerialClient(
                 port=port,
                 baudrate=baudrate,
@@ -32,42 +46,35 @@ class RelayController:
         except Exception as e:
             raise Exception(f"Не удалось подключиться к реле: {e}")
 
-        sleep(0.2)
         self._set_slave(slave_id)
 
         connect_attempts = 3
-        for attempt in range(connect_attempts):
-            sys.stderr = error_buffer
-
-            try:
-                if self._relay.connect():
-                    sys.stderr = old_stderr
-                    return
-            except Exception as e:
-                original_error_message = str(e)
-
-            stderr_output = error_buffer.getvalue()
-            if stderr_output and not original_error_message:
-                original_error_message = stderr_output.strip()
-
-            error_buffer.truncate(0)
-            error_buffer.seek(0)
-
-            sleep(0.5)
+        with capture_pymodbus_error() as pymodbus_error:
+            connected, original_error_message = retry_with_backoff(
+                self._relay.connect, attempts=connect_attempts
+            )
+        if connected:
+            return
 
-        sys.stderr = old_stderr
+        self._relay.close()
+        self._relay = None
 
         error_message = (
             f"Не удалось подключиться к реле после {connect_attempts} попыток"
         )
+        # connect() returns False rather than raising when the port can't be opened,
+        # the reason is only logged by pymodbus
+        original_error_message = original_error_message or pymodbus_error.last
+        if original_error_message:
+            error_message += f": {original_error_message}"
         raise Exception(error_message)
 
     @modbus_operation("РЕЛЕ: Закрытие соединения с устройством", "self._relay")
     def _close(self):
         self._relay.close()  # type: ignore[checking on None in wrapper]
         self._relay = None
+        self._last_close_monotonic = monotonic()
 
-    @modbus_operation("РЕЛЕ: Установка Slave", "self._relay", skip_device_check=True)
     def _set_slave(self, slave_id):
         self.slave_id = slave_id
 
@@ -88,4 +95,4 @@ class RelayController:
         return self._relay is None
 
     def GetLastError(self) -> str:
-        return get_last_error()
+        return self._last_error
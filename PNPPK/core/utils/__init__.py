@@ -7,6 +7,8 @@ from .modbus_utils import (
     get_last_error,
     reset_last_error,
     modbus_operation,
+    retry_with_backoff,
+    capture_pymodbus_error,
 )
 
 __all__ = [
@@ -16,4 +18,6 @@ __all__ = [
     "get_last_error",
     "reset_last_error",
     "modbus_operation",
+    "retry_with_backoff",
+    "capture_pymodbus_error",
 ]
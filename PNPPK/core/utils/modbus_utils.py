@@ -1,11 +1,19 @@
+import contextlib
 import functools
-from typing import Callable, Any
+import logging
+import random
+import threading
+import time
+from typing import Callable, Any, Iterator, Tuple
 
 
 MODBUS_OK = 0
 MODBUS_ERROR = -1
 LAST_ERROR = ""
 
+# Seeded from the OS, so processes started together don't get the same delays
+_backoff_random = random.SystemRandom()
+
 
 def set_last_error(error: str):
     if not isinstance(error, str):
@@ -15,6 +23,19 @@ def set_last_error(error: str):
     LAST_ERROR = error
 
 
+def _set_last_error(instance: Any, error: str):
+    # Unchecked variant for modbus_operation, which always passes a string.
+    # The instance keeps its own copy, so a failure of one device doesn't
+    # replace the message of another one polled from a different thread
+    global LAST_ERROR
+    LAST_ERROR = error
+
+    try:
+        instance._last_error = error
+    except AttributeError:
+        pass
+
+
 def get_last_error() -> str:
     global LAST_ERROR
     return LAST_ERROR
@@ -25,6 +46,87 @@ def reset_last_error():
     LAST_ERROR = ""
 
 
+class _LastErrorHandler(logging.Handler):
+    """Keeps the text of the last record logged by the thread that created it."""
+
+    def __init__(self, level=logging.WARNING):
+        super().__init__(level)
+        self.last = ""
+        self._thread_id = threading.get_ident()
+
+    def emit(self, record):
+        if record.thread == self._thread_id:
+            self.last = self.format(record)
+
+
+@contextlib.contextmanager
+def capture_pymodbus_error() -> Iterator[_LastErrorHandler]:
+    """
+    Captures the last warning or error logged by pymodbus in the current thread.
+
+    pymodbus doesn't raise when it fails to open a serial port, it logs the reason
+    and connect() just returns False. The handler yielded here holds that reason
+    in its "last" attribute ("" if nothing was logged).
+
+    Example:
+        with capture_pymodbus_error() as pymodbus_error:
+            connected = client.connect()
+        if not connected:
+            print(pymodbus_error.last)
+    """
+    handler = _LastErrorHandler()
+    logger = logging.getLogger("pymodbus")
+    logger.addHandler(handler)
+    try:
+        yield handler
+    finally:
+        logger.removeHandler(handler)
+
+
+def retry_with_backoff(
+    func: Callable[[], Any],
+    attempts: int = 3,
+    base_delay: float = 0.1,
+    max_delay: float = 2.0,
+    jitter: float = 0.5,
+) -> Tuple[Any, str]:
+    """
+    Calls func until it returns a truthy value, pausing between the attempts.
+
+    The pause doubles with every attempt (base_delay, 2 * base_delay, ...) up to
+    max_delay and is stretched by a random factor of up to (1 + jitter), so the
+    first retry comes quickly after a short glitch while a dead device isn't
+    polled at a steady rate. There is no pause after the last attempt.
+
+    Args:
+        func: Function without arguments to call, e.g. client.connect
+        attempts: Maximum number of calls
+        base_delay: Pause after the first failed attempt [s]
+        max_delay: Upper limit of the pause before the jitter is applied [s]
+        jitter: Maximum relative random increase of the pause
+
+    Returns:
+        The result of the last call (falsy if all attempts failed) and the text
+        of the last exception raised by func ("" if there was none)
+    """
+    result = None
+    error_message = ""
+    for attempt in range(attempts):
+        try:
+            result = func()
+            if result:
+                return result, error_message
+        except Exception as e:
+            result = None
+            error_message = str(e)
+
+        if attempt < attempts - 1:
+            delay = min(max_delay, base_delay * 2**attempt)
+            time.sleep(delay * (1 + _backoff_random.random() * jitter))
+
+    return result, error_message
+
+
 def modbus_operation(
     operation_name: str,
     device_attr: str,
@@ -60,25 +162,29 @@ def modbus_operation(
             self._relay.write_register(REGISTER_TURN_ON_OFF, 1)
     """
 
+    # Resolved once here rather than on every call of the wrapped method
+    attr_name = device_attr.replace("self.", "")
+    not_initialized_message = f"{operation_name} не удалось: Устройство не инициализировано (соединение не было успешно установлено)"
+    failed_message = f"{operation_name} не удалось."
+
     def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
         @functools.wraps(func)
         def wrapper(self: Any, *args: Any, **kwargs: Any) -> int:
-            attr_name = device_attr.replace("self.", "")
             device = getattr(self, attr_name, None)
 
             try:
                 # Check if device is initialized
                 if not skip_device_check and device is None:
-                    error_message = f"{operation_name} не удалось: Устройство не инициализировано (соединение не было успешно установлено)"
-                    set_last_error(error_message)
+                    _set_last_error(self, not_initialized_message)
                     return return_on_error
 
                 # Execute the wrapped function
                 try:
                     result = func(self, *args, **kwargs)
-                except Exception:
-                    error_msg = f"{operation_name} не удалось."
-                    set_last_error(error_msg)
+                except Exception as e:
+                    _set_last_error(
+                        self, f"{failed_message} {e}" if str(e) else failed_message
+                    )
 
                     if cleanup_on_error and device is not None:
                         try:
@@ -91,19 +197,20 @@ def modbus_operation(
                     return return_on_error
 
                 if result == MODBUS_ERROR:
-                    set_last_error(get_last_error())
+                    # The wrapped function has stored its message on the instance
                     return return_on_error
 
+                # The last error is left as is on success, it's only read
+                # after an operation has failed, and every failure sets its own
                 if preserve_return_value:
                     return result
-                else:
-                    reset_last_error()
-                    return return_on_success
+                return return_on_success
 
-            except Exception:
+            except Exception as e:
                 # Set error message
-                error_msg = f"{operation_name} не удалось."
-                set_last_error(error_msg)
+                _set_last_error(
+                    self, f"{failed_message} {e}" if str(e) else failed_message
+                )
 
                 # Clean up device if requested
                 if cleanup_on_error and device is not None:
@@ -1,6 +1,15 @@
+import os
+import copy
 import yaml
+import functools
 import yaml.scanner
 
+# LibYAML C bindings are several times faster, PyYAML may be built without them
+try:
+    from yaml import CSafeLoader as _SafeLoader, CSafeDumper as _SafeDumper
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader, SafeDumper as _SafeDumper  # type: ignore[assignment]
+
 
 class YAMLConfigLoaderException(Exception):
     """
@@ -101,21 +110,39 @@ class YAMLConfigLoader:
         :raises YAMLConfigLoaderException: For unexpected errors during file loading.
 
         Algorithm:
-        1. Attempt to open the specified file.
-        2. Parse the file using yaml.safe_load().
-        3. Return the parsed configuration as a dictionary.
+        1. Return the configuration already loaded by this process if the YAML
+           file did not change since.
+        2. Otherwise attempt to open the specified file.
+        3. Parse the file with the safe loader and remember the result.
+        4. Return the parsed configuration as a dictionary.
 
         Edge Cases:
         - Missing file raises ConfigFileNotFoundError
-          (inside: Algorithm p. 1).
-        - Invalid YAML syntax raises ConfigFileFormatError
           (inside: Algorithm p. 2).
-        - Any unexpected exceptions are raised as YAMLConfigLoaderException
+        - Invalid YAML syntax raises ConfigFileFormatError
           (inside: Algorithm p. 3).
+        - Any unexpected exceptions are raised as YAMLConfigLoaderException
+          (inside: Algorithm p. 4).
+        - The result is a copy, modifying it does not affect later loads.
         """
+        # The signature is taken before the file is read, so a change made while
+        # reading is detected by the next load instead of being cached as old
+        try:
+            signature = YAMLConfigLoader._file_signature(file_path)
+        except Exception:
+            # Missing or inaccessible file, reported by _read_config
+            return YAMLConfigLoader._read_config(file_path)
+
+        return copy.deepcopy(_read_config_memoized(file_path, signature))
+
+    @staticmethod
+    def _read_config(file_path: str) -> dict:
+        """Parses the YAML file."""
         try:
-            with open(file_path, "r") as file:
-                return yaml.safe_load(file)
+            # The loader takes bytes and detects the encoding itself (UTF-8 unless
+            # there is a BOM), so no text decoding layer is needed
+            with open(file_path, "rb") as file:
+                config = yaml.load(file.read(), Loader=_SafeLoader)
         except FileNotFoundError:
             raise YAMLConfigFileNotFoundError(file_path)
         except (yaml.YAMLError, yaml.scanner.ScannerError) as e:
@@ -125,6 +152,13 @@ class YAMLConfigLoader:
                 f"Unexpected error loading configuration file {file_path}: {e}"
             )
 
+        return config
+
+    @staticmethod
+    def _file_signature(file_path: str) -> tuple:
+        stat = os.stat(file_path)
+        return stat.st_mtime_ns, stat.st_size
+
     @staticmethod
     def save_config(file_path: str, config_data: dict) -> None:
         """
@@ -137,17 +171,35 @@ class YAMLConfigLoader:
         :raises YAMLConfigLoaderException: For errors during file saving.
 
         Algorithm:
-        1. Attempt to open the specified file for writing.
-        2. Write the configuration data using yaml.safe_dump().
+        1. Drop the configurations remembered by this process.
+        2. Attempt to open the specified file for writing.
+        3. Write the configuration data with the safe dumper.
 
         Edge Cases:
         - Permission errors or other IO errors raise YAMLConfigLoaderException.
         - Invalid data types in config_data may cause YAML serialization errors.
+        - The remembered configurations are dropped even if the write fails,
+          the file may be partially written (inside: Algorithm p. 1).
         """
+        # A rewrite of the same size within the mtime resolution of the file
+        # system (e.g. 2 s on FAT) would otherwise still match the old signature
+        _read_config_memoized.cache_clear()
+
         try:
             with open(file_path, "w") as file:
-                yaml.safe_dump(config_data, file, default_flow_style=False)
+                yaml.dump(
+                    config_data, file, Dumper=_SafeDumper, default_flow_style=False
+                )
         except Exception as e:
             raise YAMLConfigLoaderException(
                 f"Error saving configuration to file {file_path}: {e}"
             )
+
+
+@functools.lru_cache(maxsize=32)
+def _read_config_memoized(file_path: str, signature: tuple) -> dict:
+    """
+    Keeps the configurations loaded by this process. The key includes the
+    modification time and size of the file, so a changed file is read again.
+    """
+    return YAMLConfigLoader._read_config(file_path)
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+from PyQt5 import QtCore
+
+# Windows broadcasts this message to all top-level windows when a device is
+# plugged in or removed (wParam is DBT_DEVNODES_CHANGED and friends)
+WM_DEVICECHANGE = 0x0219
+
+
+class DeviceChangeFilter(QtCore.QAbstractNativeEventFilter):
+    """
+    Calls the callback when Windows reports that the set of devices changed.
+
+    Enumerating the COM ports on Windows walks the registry, so instead of
+    doing it on a timer the window re-reads the ports only after this
+    notification. The callback runs inside the native event dispatch and must
+    only schedule the actual work. The filter has to be removed from the
+    application before it is destroyed.
+    """
+
+    def __init__(self, callback):
+        super().__init__()
+        self._callback = callback
+
+    def nativeEventFilter(self, event_type, message):
+        if event_type == b"windows_generic_MSG":
+            from ctypes import wintypes
+
+            msg = wintypes.MSG.from_address(int(message))
+            if msg.message == WM_DEVICECHANGE:
+                self._callback()
+
+        # Never consume the message, Qt and the other filters still get it
+        return False, 0
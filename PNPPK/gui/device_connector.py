@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+from PyQt5 import QtCore
+from core.utils import MODBUS_OK
+
+
+class DeviceConnector(QtCore.QObject):
+    """
+    Turns on the relay and then the GFR.
+
+    Opening a port retries with pauses between the attempts and can take a few
+    seconds per device, so the object is meant to run in a worker QThread while
+    the window stays responsive. Results are delivered back through signals,
+    which Qt queues into the thread of the receiving window.
+    """
+
+    # Result of the relay TurnOn (MODBUS_OK or MODBUS_ERROR) and the port used
+    relay_turned_on = QtCore.pyqtSignal(int, str)
+
+    # Result of the GFR TurnOn and the port used, not emitted if the relay failed
+    gfr_turned_on = QtCore.pyqtSignal(int, str)
+
+    # Emitted when all connection attempts are over
+    finished = QtCore.pyqtSignal()
+
+    def __init__(
+        self,
+        relay_controller,
+        relay_port,
+        relay_settings,
+        gfr_controller,
+        gfr_port,
+        gfr_settings,
+    ):
+        super().__init__()
+        self._relay_controller = relay_controller
+        self._relay_port = relay_port
+        self._relay_settings = relay_settings
+        self._gfr_controller = gfr_controller
+        self._gfr_port = gfr_port
+        self._gfr_settings = gfr_settings
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        """Connects to the devices and emits the results."""
+        try:
+            self._connect()
+        finally:
+            self.finished.emit()
+
+    def _connect(self):
+        # 1. Connect to the relay
+        relay_err = self._relay_controller.TurnOn(
+            self._relay_port, **self._relay_settings
+        )
+        self.relay_turned_on.emit(relay_err, self._relay_port)
+        if relay_err != MODBUS_OK:
+            return
+
+        # 2. Connect to the Gas Flow Regulator
+        gfr_err = self._gfr_controller.TurnOn(self._gfr_port, **self._gfr_settings)
+        self.gfr_turned_on.emit(gfr_err, self._gfr_port)
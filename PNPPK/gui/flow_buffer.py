@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+
+class FlowBuffer:
+    """
+    Flow measurements stored column-wise in two NumPy arrays.
+
+    The arrays are preallocated and grow geometrically, so appending a point
+    is amortized O(1) without per-point allocations, and the plotting code gets
+    contiguous `times`/`flows` arrays without unzipping Python tuples.
+
+    For the rest of the window the buffer still behaves like the list of
+    (time in minutes, flow) tuples it replaces: it supports len(), iteration,
+    indexing, slicing and comparison with a list.
+
+    With max_size the buffer keeps only the last max_size points. The oldest
+    point is dropped by moving the start of the stored range, and the range is
+    moved back to the beginning of the arrays once it reaches their end, so
+    the views stay contiguous and appending stays amortized O(1).
+    """
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, points=(), max_size=None):
+        self._times = np.empty(self.INITIAL_CAPACITY, dtype=np.float64)
+        self._flows = np.empty(self.INITIAL_CAPACITY, dtype=np.float64)
+        self._start = 0
+        self._size = 0
+        self.max_size = max_size
+
+        for point in points:
+            self.append(point)
+
+    @property
+    def times(self) -> np.ndarray:
+        """Measurement times [min], a view valid until the next append."""
+        return self._times[self._start : self._start + self._size]
+
+    @property
+    def flows(self) -> np.ndarray:
+        """Measured flows [cm3/min], a view valid until the next append."""
+        return self._flows[self._start : self._start + self._size]
+
+    def append(self, point):
+        time, flow = point
+
+        if self._size == self.max_size:
+            self._start += 1
+            self._size -= 1
+
+        end = self._start + self._size
+        if end == self._times.size:
+            if self._start >= self._size:
+                # At least half of the arrays is dropped points, reuse them
+                self._times[: self._size] = self._times[self._start : end]
+                self._flows[: self._size] = self._flows[self._start : end]
+                self._start = 0
+            else:
+                capacity = self._times.size * 2
+                self._times = np.resize(self._times, capacity)
+                self._flows = np.resize(self._flows, capacity)
+            end = self._start + self._size
+
+        self._times[end] = time
+        self._flows[end] = flow
+        self._size += 1
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return zip(self.times.tolist(), self.flows.tolist())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(zip(self.times[index].tolist(), self.flows[index].tolist()))
+        return self.times[index].item(), self.flows[index].item()
+
+    def __eq__(self, other):
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return f"FlowBuffer({list(self)!r})"
+
+
+def decimate_peaks(times, flows, bucket_size):
+    """
+    Reduces a series to the lowest and the highest flow of each bucket.
+
+    The points are split into consecutive buckets of bucket_size points, and
+    every bucket is replaced by its two extreme points, kept in time order.
+    Drawn at one bucket per pixel column, the line looks the same as with all
+    the points (spikes are never dropped), but costs far less to render.
+
+    Args:
+        times: Measurement times, increasing
+        flows: Measured flows
+        bucket_size: Number of points per bucket, nothing is dropped if <= 2
+
+    Returns:
+        (times, flows) of the kept points
+    """
+    if bucket_size <= 2 or times.size <= bucket_size:
+        return times, flows
+
+    # The points that don't fill a whole bucket at the end are kept as they are
+    full_size = times.size - times.size % bucket_size
+    buckets = flows[:full_size].reshape(-1, bucket_size)
+    offsets = np.arange(0, full_size, bucket_size)
+
+    kept = np.concatenate(
+        (
+            offsets + buckets.argmin(axis=1),
+            offsets + buckets.argmax(axis=1),
+            np.arange(full_size, times.size),
+        )
+    )
+    kept = np.unique(kept)  # Sorted, and a flat bucket gives the same point twice
+
+    return times[kept], flows[kept]
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+import time
+from PyQt5 import QtCore
+from core.utils import MODBUS_OK
+
+
+class GFRPoller(QtCore.QObject):
+    """
+    Reads the current flow from the GFR controller.
+
+    The object is meant to live in a worker QThread: a Modbus read blocks for up
+    to the configured timeout, and running it there keeps the GUI thread free to
+    repaint. Results are delivered back through signals, which Qt queues into the
+    thread of the receiving window.
+    """
+
+    # Flow value in [cm3/min] and the time of the read (time.monotonic()) after
+    # a successful read
+    flow_measured = QtCore.pyqtSignal(float, float)
+
+    # The device answered with an error, details are in GetLastError()
+    poll_failed = QtCore.pyqtSignal()
+
+    # The read raised, the connection is most likely lost
+    connection_lost = QtCore.pyqtSignal()
+
+    # Emitted after every poll request, whatever its outcome
+    poll_finished = QtCore.pyqtSignal()
+
+    def __init__(self, gfr_controller):
+        super().__init__()
+        self._gfr_controller = gfr_controller
+
+    @QtCore.pyqtSlot()
+    def poll(self):
+        """Performs one flow read and emits the matching signal."""
+        try:
+            self._read_flow()
+        finally:
+            self.poll_finished.emit()
+
+    def _read_flow(self):
+        if self._gfr_controller.IsDisconnected():
+            return
+
+        try:
+            err, flow = self._gfr_controller.GetFlow()
+        except Exception:
+            self.connection_lost.emit()
+            return
+
+        # Timestamp the value here rather than when the GUI gets to it
+        sampled_at = time.monotonic()
+
+        if err == MODBUS_OK:
+            self.flow_measured.emit(flow, sampled_at)
+        else:
+            self.poll_failed.emit()
@@ -1,7 +1,12 @@
 # -*- coding: utf-8 -*-
 
 import os
+import sys
+import time
+import shutil
+import tempfile
 import datetime
+import numpy as np
 import serial.tools.list_ports
 from core.yaml_config_loader import YAMLConfigLoader
 from PyQt5.QtGui import QKeySequence
@@ -10,10 +15,17 @@ from core.relay.controller import RelayController
 from core.utils import MODBUS_OK, MODBUS_ERROR
 from PyQt5 import QtWidgets, QtCore, QtGui
 from PyQt5.QtWidgets import QMessageBox, QShortcut
+from gui.device_change_filter import DeviceChangeFilter
+from gui.device_connector import DeviceConnector
+from gui.flow_buffer import FlowBuffer, decimate_peaks
+from gui.flow_poller import GFRPoller
 
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config")
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "log")
+RELAY_CONFIG_PATH = os.path.join(CONFIG_DIR, "relay.yaml")
+GFR_CONFIG_PATH = os.path.join(CONFIG_DIR, "gfr.yaml")
+PORTS_CONFIG_PATH = os.path.join(CONFIG_DIR, "ports.yaml")
 
 RELAY_DEFAULT_BAUDRATE = 115200
 RELAY_DEFAULT_TIMEOUT = 50
@@ -28,10 +40,52 @@ GFR_DEFAULT_SLAVE_ID = 1
 GFR_DEFAULT_PARITY = "N"
 GFR_DEFAULT_DATA_BIT = 8
 GFR_DEFAULT_STOP_BIT = 1
+GFR_DEFAULT_INTER_BYTE_TIMEOUT = 20
+
+# Values used for the keys missing in relay.yaml / gfr.yaml
+RELAY_DEFAULTS = {
+    "baudrate": RELAY_DEFAULT_BAUDRATE,
+    "parity": RELAY_DEFAULT_PARITY,
+    "data_bit": RELAY_DEFAULT_DATA_BIT,
+    "stop_bit": RELAY_DEFAULT_STOP_BIT,
+    "slave_id": RELAY_DEFAULT_SLAVE_ID,
+    "timeout": RELAY_DEFAULT_TIMEOUT,
+}
+GFR_DEFAULTS = {
+    "baudrate": GFR_DEFAULT_BAUDRATE,
+    "parity": GFR_DEFAULT_PARITY,
+    "data_bit": GFR_DEFAULT_DATA_BIT,
+    "stop_bit": GFR_DEFAULT_STOP_BIT,
+    "slave_id": GFR_DEFAULT_SLAVE_ID,
+    "timeout": GFR_DEFAULT_TIMEOUT,
+    "inter_byte_timeout": GFR_DEFAULT_INTER_BYTE_TIMEOUT,
+}
 
 PLOT_UPDATE_TIME_TICK_MS = 200
+# The graph is redrawn less often than the flow is polled: with the defaults
+# there is one redraw per 5 measurements. Overridden by "render_interval" in gfr.yaml
+PLOT_RENDER_TIME_TICK_MS = 1000
+# Limits of the redraw interval the user can choose in the window
+PLOT_RENDER_TIME_TICK_MIN_MS = 100
+PLOT_RENDER_TIME_TICK_MAX_MS = 10000
 PLOT_MEASUREMENT_COUNTER = 0
 
+# The graph keeps the points of the last PLOT_HISTORY_MINUTES (at the polling
+# rate), all the measurements are kept in a file for the CSV export
+PLOT_HISTORY_MINUTES = 60
+PLOT_HISTORY_MAX_POINTS = PLOT_HISTORY_MINUTES * 60 * 1000 // PLOT_UPDATE_TIME_TICK_MS
+
+FLOW_CSV_HEADER = "Время [мин],Расход [см3/мин]\n"
+
+# Points further apart than this are not connected on the graph
+# (0.05 minutes is about 3 seconds)
+PLOT_GAP_THRESHOLD_MIN = 0.05
+
+# Log messages are shown in the console in batches, and only the last
+# LOG_CONSOLE_MAX_LINES lines are kept there (the log file has all of them)
+LOG_FLUSH_TIME_TICK_MS = 500
+LOG_CONSOLE_MAX_LINES = 500
+
 HELP_MESSAGE = (
     "Если долго нет подключения к какому-либо из устройств, "
     + "попробуйте перезапустить программу или поменять подключения к другим COM-портам."
@@ -39,6 +93,9 @@ HELP_MESSAGE = (
 
 
 class GFRControlWindow(QtWidgets.QMainWindow):
+    # Asks the flow poller for a new measurement (queued into the poller thread)
+    _flow_poll_requested = QtCore.pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Панель управления РРГ")
@@ -49,19 +106,37 @@ class GFRControlWindow(QtWidgets.QMainWindow):
         self.config_loader = YAMLConfigLoader()
 
         self.available_ports: list[str] = self._get_available_ports()
-        self.previous_port_count = len(self.available_ports)
+        self.previous_ports = frozenset(self.available_ports)
+
+        # Flow is read in a worker thread while the GFR is on, see _start_flow_poller
+        self.flow_poller = None
+        self.flow_poller_thread = None
+        self.flow_poll_pending = False
+        self.log_next_flow = False
+
+        # Set when new measurements are waiting to be drawn, see _render_graph
+        self.plot_dirty = False
+
+        # Devices are turned on in a worker thread, see _start_device_connector
+        self.device_connector = None
+        self.device_connector_thread = None
+        self.recovery_pending = False
 
         # Variables to store previously saved ports
         self.saved_relay_port = None
         self.saved_gfr_port = None
 
-        # Add tracking for the last successful measurement time
-        self.last_measurement_time = datetime.datetime.now()
+        # Selections and port list the combo boxes were last synced with
+        self._last_combo_key = None
+
+        # Add tracking for the last successful measurement time (time.monotonic())
+        self.last_measurement_time = time.monotonic()
         self.measurement_stalled = False
 
         # Initialize log file path and handle
         self.log_file_path = None
         self.log_file_handle = None
+        self.log_buffer: list[str] = []
         # self.log_file_announced = False # No longer needed
 
         self._create_toolbar()
@@ -88,19 +163,35 @@ class GFRControlWindow(QtWidgets.QMainWindow):
         # Check every 2 seconds (2000 ms) - not too often to avoid performance impact
         self.connection_check_timer.start(2000)
 
-        # Create a timer for detecting stalled measurements
+        # On Windows the ports are enumerated only after the system reports a
+        # device change, elsewhere on every connection check. The notifications
+        # come in bursts, so the check runs once they calm down
+        self.ports_dirty = True
+        self.device_change_timer = QtCore.QTimer(self)
+        self.device_change_timer.setSingleShot(True)
+        self.device_change_timer.setInterval(500)
+        self.device_change_timer.timeout.connect(self._check_device_connections)
+
+        self.device_change_filter = None
+        if sys.platform == "win32":
+            self.device_change_filter = DeviceChangeFilter(self._on_devices_changed)
+            QtWidgets.QApplication.instance().installNativeEventFilter(
+                self.device_change_filter
+            )
+
+        # Create a timer for detecting stalled measurements, it runs together
+        # with the flow poller
         self.stall_check_timer = QtCore.QTimer(self)
+        self.stall_check_timer.setInterval(5000)  # Check every 5 seconds
         self.stall_check_timer.timeout.connect(self._check_measurement_stall)
-        self.stall_check_timer.start(5000)  # Check every 5 seconds
 
     def _init_logging(self):
         """Initializes the logging system, creates the log file and keeps the handle open."""
         try:
-            log_dir = os.path.join(os.path.dirname(__file__), "..", "log")
-            os.makedirs(log_dir, exist_ok=True)
+            os.makedirs(LOG_DIR, exist_ok=True)
             log_filename_format = "%d.%m.%Y_%H-%M-%S"
             initial_log_path = os.path.join(
-                log_dir, f"{datetime.datetime.now().strftime(log_filename_format)}.log"
+                LOG_DIR, f"{datetime.datetime.now().strftime(log_filename_format)}.log"
             )
             self.log_file_path = os.path.abspath(initial_log_path)
 
@@ -134,18 +225,8 @@ class GFRControlWindow(QtWidgets.QMainWindow):
         Overrides the window close event to prompt the user for confirmation
         and safely close connections.
         """
-        reply = QMessageBox.question(
-            self,
-            "Подтвердить выход",
-            "Вы уверены, что хотите выйти?",
-            QMessageBox.Yes | QMessageBox.No,
-            QMessageBox.No,
-        )
-        if reply == QMessageBox.Yes:
-            # Save current port settings before closing
-            self._save_port_settings()
-
-            self._safe_close_connections()
+        if self._ask_exit():
+            self._prepare_exit()
             event.accept()
         else:
             event.ignore()
@@ -158,21 +239,29 @@ class GFRControlWindow(QtWidgets.QMainWindow):
         It detects:
         1. Physical disconnection of devices
         2. Changes in the number of available COM ports
+        3. Newly plugged ports, which are added to the combo boxes
         """
-        # Always check if the number of available ports has changed
-        current_ports = self._get_available_ports()
-        current_port_count = len(current_ports)
-
-        # If the number of ports has decreased, a device was likely disconnected
-        if current_port_count < self.previous_port_count:
-            self.previous_port_count = current_port_count
-            self._handle_device_disconnection(
-                "Обнаружено отключение USB-адаптера. Проверьте подключение устройств."
-            )
-            return
+        # Check if the number of available ports has changed, unless the system
+        # notifies about device changes and there was none since the last check
+        if self.device_change_filter is None or self.ports_dirty:
+            self.ports_dirty = False
+            current_ports = self._get_available_ports()
+            current_port_set = frozenset(current_ports)
+
+            # If a port has disappeared, a device was likely disconnected. This
+            # is also the case when another port appeared instead of it (e.g.
+            # the ports were renumbered), so the port names are compared
+            removed_ports = self.previous_ports - current_port_set
+            self.previous_ports = current_port_set
+            if removed_ports:
+                self._handle_device_disconnection(
+                    "Обнаружено отключение USB-адаптера. Проверьте подключение устройств."
+                )
+                return
 
-        # Update the previous count
-        self.previous_port_count = current_port_count
+            # A port was plugged in (or replaced): update the cached list and the
+            # combo boxes, so they never have to enumerate the ports themselves
+            self._apply_available_ports(current_ports)
 
         # Only check device responsiveness if they are connected
         if self.toggle_gfr_button.isChecked():
@@ -194,6 +283,11 @@ class GFRControlWindow(QtWidgets.QMainWindow):
                         f"Потеряна связь с реле: {str(e)}"
                     )
 
+    def _on_devices_changed(self):
+        """Called by the device change filter, schedules a port check."""
+        self.ports_dirty = True
+        self.device_change_timer.start()
+
     def _check_gfr_connectivity(self):
         """
         Performs a lightweight check to see if the GFR device is still connected.
@@ -248,69 +342,148 @@ class GFRControlWindow(QtWidgets.QMainWindow):
             QMessageBox.Ok,
         )
 
+    @QtCore.pyqtSlot()
     def _update_graph(self):
         """
-        Queries the current flow from the GFR controller, appends the data point,
-        and updates the Matplotlib graph.
+        Requests a flow measurement from the poller thread. The result arrives
+        in _on_flow_measured, which appends the data point and updates the graph.
         """
         # If the GFR is disconnected or in the process of disconnection, return without adding data
-        if (
-            self.gfr_controller.IsDisconnected()
-            or not self.toggle_gfr_button.isChecked()
-        ):
+        if not self._is_gfr_polling():
             return
 
-        try:
-            err, flow = self.gfr_controller.GetFlow()
+        # Never queue a new read behind one still in progress: a slow device
+        # then simply gets polled less often instead of accumulating requests
+        if self.flow_poller_thread is not None and not self.flow_poll_pending:
+            self.flow_poll_pending = True
+            self._flow_poll_requested.emit()
 
-            # If we get here, we can consider this a successful connectivity check
-            self._check_gfr_connectivity()
-        except Exception:
-            # Handle the disconnection case more gracefully
-            self._handle_device_disconnection(
-                f"Не удалось получить данные расхода, проверьте подключение к РРГ. {HELP_MESSAGE}"
-            )
+    def _is_gfr_polling(self):
+        """Returns True while measurements are expected from the GFR."""
+        return (
+            not self.gfr_controller.IsDisconnected()
+            and self.toggle_gfr_button.isChecked()
+        )
+
+    def _start_flow_poller(self):
+        """Starts the worker thread that reads the flow from the GFR."""
+        if self.flow_poller_thread is not None:
             return
 
-        current_time = datetime.datetime.now()
-        elapsed_minutes = (
-            current_time - self.start_time
-        ).total_seconds() / 60  # Convert to minutes
+        self.flow_poller_thread = QtCore.QThread()
+        self.flow_poller = GFRPoller(self.gfr_controller)
+        self.flow_poller.moveToThread(self.flow_poller_thread)
 
-        if err == MODBUS_OK:
-            # The zero point is only added when the device is intentionally
-            # turned on in _open_connections method, so we don't need to check for
-            # previous zero values here anymore
+        self._flow_poll_requested.connect(self.flow_poller.poll)
+        self.flow_poller.flow_measured.connect(self._on_flow_measured)
+        self.flow_poller.poll_failed.connect(self._on_flow_poll_failed)
+        self.flow_poller.connection_lost.connect(self._on_flow_connection_lost)
+        self.flow_poller.poll_finished.connect(self._on_flow_poll_finished)
+        self.flow_poller_thread.finished.connect(self.flow_poller.deleteLater)
 
-            self.flow_data.append((elapsed_minutes, flow))
-            self._update_plot_visualization()
+        self.flow_poller_thread.start()
 
-            # Update the last successful measurement time
-            self.last_measurement_time = current_time
-            # Reset the stalled flag if it was set
-            if self.measurement_stalled:
-                self.measurement_stalled = False
+        # The flow is only polled while the GFR is on, so the timers don't
+        # wake the event loop for nothing while it is off. A stall is counted
+        # from now, not from the last measurement of a previous session
+        self.graph_timer.start(PLOT_UPDATE_TIME_TICK_MS)
+        self.last_measurement_time = time.monotonic()
+        self.stall_check_timer.start()
+        # The render timer is stopped when the connections are closed after a
+        # failure, the measurements after reconnecting have to be drawn again
+        self.render_timer.start()
 
-            global PLOT_MEASUREMENT_COUNTER
-            PLOT_MEASUREMENT_COUNTER += 1
+    def _stop_flow_poller(self):
+        """
+        Stops the flow poller thread, waiting for a read in progress to finish,
+        so the GFR connection can be closed safely afterwards.
+        """
+        self.graph_timer.stop()
+        self.stall_check_timer.stop()
 
-            # Each 50 times we will log the message
-            if PLOT_MEASUREMENT_COUNTER % 50 == 0:
-                self._log_message(
-                    f"Текущий расход: {flow} [см3/мин] в момент времени {elapsed_minutes:.2f} [мин]"
-                )
-        else:
+        if self.flow_poller_thread is None:
+            return
+
+        self._flow_poll_requested.disconnect(self.flow_poller.poll)
+        self.flow_poller_thread.quit()
+        self.flow_poller_thread.wait()
+
+        self.flow_poller = None
+        self.flow_poller_thread = None
+        self.flow_poll_pending = False
+
+    @QtCore.pyqtSlot()
+    def _on_flow_poll_finished(self):
+        self.flow_poll_pending = False
+
+    @QtCore.pyqtSlot(float, float)
+    def _on_flow_measured(self, flow, sampled_at):
+        """Appends a measured flow value to the graph."""
+        # Results of reads that were in flight while the GFR was being turned off
+        if not self._is_gfr_polling():
+            return
+
+        elapsed_minutes = (sampled_at - self.start_time) / 60  # Convert to minutes
+
+        # The zero point is only added when the device is intentionally
+        # turned on in _open_connections method, so we don't need to check for
+        # previous zero values here anymore
+
+        self._record_flow(elapsed_minutes, flow)
+        self.plot_dirty = True
+
+        # Update the last successful measurement time
+        self.last_measurement_time = sampled_at
+        # Reset the stalled flag if it was set
+        if self.measurement_stalled:
+            self.measurement_stalled = False
+
+        global PLOT_MEASUREMENT_COUNTER
+        PLOT_MEASUREMENT_COUNTER += 1
+
+        if self.log_next_flow:
+            self.log_next_flow = False
+            self._log_message(f"Расход после включения: {flow} [см3/мин]")
+
+        # Each 50 times we will log the message
+        elif PLOT_MEASUREMENT_COUNTER % 50 == 0:
+            self._log_message(
+                f"Текущий расход: {flow} [см3/мин] в момент времени {elapsed_minutes:.2f} [мин]"
+            )
+
+    @QtCore.pyqtSlot()
+    def _render_graph(self):
+        """Redraws the graph if measurements were added since the last redraw."""
+        if not self.plot_dirty:
+            return
+
+        self.plot_dirty = False
+        self._update_plot_visualization()
+
+    @QtCore.pyqtSlot()
+    def _on_flow_poll_failed(self):
+        if self._is_gfr_polling():
             self._gfr_show_error_msg()
 
+    @QtCore.pyqtSlot()
+    def _on_flow_connection_lost(self):
+        if self._is_gfr_polling():
+            # Handle the disconnection case more gracefully
+            self._handle_device_disconnection(
+                f"Не удалось получить данные расхода, проверьте подключение к РРГ. {HELP_MESSAGE}"
+            )
+
     def _safe_close_connections(self):
         """
         Safely closes all connections before exiting the application.
         Ignores possible errors to ensure the exit.
         """
         try:
-            # Stop the graph timer
-            if hasattr(self, "graph_timer") and self.graph_timer is not None:
-                self.graph_timer.stop()
+            # Stop the graph timers (both are created with the window)
+            self.graph_timer.stop()
+            self.render_timer.stop()
+            self._stop_device_connector()
+            self._stop_flow_poller()
 
             # 1. Disconnect the GFR
             if self.gfr_controller.IsConnected():
@@ -336,101 +509,179 @@ class GFRControlWindow(QtWidgets.QMainWindow):
 
     def _init_graph(self):
         """Initializes the Matplotlib graph for displaying flow over time."""
+        # Matplotlib is imported here, so importing the module (e.g. to test
+        # the configuration or the poller) doesn't pay for its initialization
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+
         self.figure = Figure(figsize=(20, 10))
         self.canvas = FigureCanvas(self.figure)
         self.canvas.setMinimumHeight(500)
         self.ax = self.figure.add_subplot(111)
 
+        # Static decorations are set up once, only the line changes between ticks
         self.ax.set_xlabel("Время [мин]")
         self.ax.set_ylabel("Расход [см3/мин]")
         self.ax.set_title("Расход газа по времени Q(t)")
+        self.ax.minorticks_on()
+        self.ax.grid(True, which="major", linestyle="-", linewidth=0.8)
+        self.ax.grid(True, which="minor", linestyle="--", linewidth=0.5, alpha=0.5)
+
+        # The line is animated: full redraws skip it and it is blitted on top of
+        # the cached background instead
+        (self.line,) = self.ax.plot(
+            [], [], marker="o", linestyle="-", markersize=1, animated=True
+        )
+        self.plot_background = None
+        self.canvas.mpl_connect("draw_event", self._on_canvas_draw)
+
+        # All the measurements are written to a CSV file in the log directory
+        # as they arrive, so they survive a crash, the graph only keeps the
+        # recent ones. The file is created with the first measurement
+        self.flow_history_file = None
+        # Stores (time in minutes, flow)
+        self.flow_data = FlowBuffer(max_size=PLOT_HISTORY_MAX_POINTS)
+        # Set start time for reference, time.monotonic() keeps the time axis
+        # steady when the wall clock is adjusted
+        self.start_time = time.monotonic()
+
+    def _open_flow_history(self):
+        """Creates the file the measurements of this session are written to."""
+        try:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            file_name = (
+                f"{datetime.datetime.now().strftime('%d.%m.%Y_%H-%M-%S')}_flow.csv"
+            )
+            # Line buffered, so every measurement is on disk once it is written
+            history_file = open(os.path.join(LOG_DIR, file_name), "w+", buffering=1)
+        except OSError:
+            # Without the log directory the history is kept in a temporary file
+            history_file = tempfile.TemporaryFile("w+", buffering=1)
+
+        history_file.write(FLOW_CSV_HEADER)
+        return history_file
+
+    def _reset_flow_history(self):
+        """Drops all the recorded measurements, leaving only the CSV header."""
+        if self.flow_history_file is None:
+            return
+
+        self.flow_history_file.seek(0)
+        self.flow_history_file.truncate()
+        self.flow_history_file.write(FLOW_CSV_HEADER)
+
+    def _close_flow_history(self):
+        if self.flow_history_file is not None:
+            self.flow_history_file.close()
+            self.flow_history_file = None
+
+    def _record_flow(self, elapsed_minutes, flow):
+        """Adds a measurement to the graph and to the history for the CSV export."""
+        if self.flow_history_file is None:
+            self.flow_history_file = self._open_flow_history()
+
+        self.flow_data.append((elapsed_minutes, flow))
+        self.flow_history_file.write(f"{elapsed_minutes:.2f},{flow:.3f}\n")
 
-        self.flow_data = []  # Stores (time in minutes, flow)
-        self.start_time = datetime.datetime.now()  # Set start time for reference
+    def _on_canvas_draw(self, event):
+        """
+        Caches the axes without the line after every full redraw (including the ones
+        caused by resizing) and draws the line on top.
+        """
+        if not self.line.get_animated():
+            return  # The line is drawn as a regular artist, e.g. while saving
+
+        self.plot_background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line)
 
     def _update_plot_visualization(self):
         if not self.flow_data:
             return
 
-        times = [t for t, _ in self.flow_data]
-        flows = [f for _, f in self.flow_data]
+        times = self.flow_data.times
+        flows = self.flow_data.flows
+
+        # Break the line at significant time gaps by inserting NaN points
+        gaps = np.flatnonzero(np.diff(times) > PLOT_GAP_THRESHOLD_MIN) + 1
+
+        # A long session has many more points than the axes have pixel columns:
+        # only the extremes of each column's worth of points can be seen anyway
+        columns = max(int(self.ax.bbox.width), 1)
+        bucket_size = -(-times.size // columns)
+        if bucket_size > 2:
+            bounds = np.concatenate(([0], gaps, [times.size]))
+            segments = [
+                decimate_peaks(times[start:end], flows[start:end], bucket_size)
+                for start, end in zip(bounds[:-1], bounds[1:])
+            ]
+            separator = np.array([np.nan])
+            times = np.concatenate(
+                [part for t, _ in segments for part in (separator, t)][1:]
+            )
+            flows = np.concatenate(
+                [part for _, f in segments for part in (separator, f)][1:]
+            )
+        elif gaps.size:
+            times = np.insert(times, gaps, np.nan)
+            flows = np.insert(flows, gaps, np.nan)
+
+        self.line.set_data(times, flows)
+
+        if self._rescale_axes() or self.plot_background is None:
+            # Limits changed, redraw everything (the background is recaptured).
+            # The redraw is deferred to the event loop, so several requests
+            # made before it runs are merged into one Agg render
+            self.plot_background = None
+            self.canvas.draw_idle()
+        else:
+            self.canvas.restore_region(self.plot_background)
+            self.ax.draw_artist(self.line)
+            self.canvas.blit(self.ax.bbox)
 
-        self.ax.clear()
+    def _rescale_axes(self):
+        """
+        Extends the axes limits when the data goes beyond them.
 
-        if len(times) <= 1:
-            # If there's only one point, plot it normally
-            self.ax.plot(times, flows, marker="o", linestyle="-", markersize=1)
-        else:
-            # Find significant time gaps and create separate plot segments
-            segments_times = []
-            segments_flows = []
-
-            # Start the first segment
-            current_segment_times = [times[0]]
-            current_segment_flows = [flows[0]]
-
-            # Define what constitutes a "gap" - 0.05 minutes is about 3 seconds
-            GAP_THRESHOLD = 0.05
-
-            # Split data into segments based on time gaps
-            for i in range(1, len(times)):
-                time_gap = times[i] - times[i - 1]
-
-                if time_gap > GAP_THRESHOLD:
-                    # Save the current segment if it has points
-                    if current_segment_times:
-                        segments_times.append(current_segment_times)
-                        segments_flows.append(current_segment_flows)
-
-                    # Start a new segment
-                    current_segment_times = [times[i]]
-                    current_segment_flows = [flows[i]]
-                else:
-                    # Continue the current segment
-                    current_segment_times.append(times[i])
-                    current_segment_flows.append(flows[i])
-
-            # Add the last segment
-            if current_segment_times:
-                segments_times.append(current_segment_times)
-                segments_flows.append(current_segment_flows)
-
-            # Plot each segment separately
-            for i in range(len(segments_times)):
-                self.ax.plot(
-                    segments_times[i],
-                    segments_flows[i],
-                    marker="o",
-                    linestyle="-",
-                    markersize=1,
-                )
+        Returns:
+            True if the limits were changed and the graph needs a full redraw
+        """
+        times = self.flow_data.times
+        flows = self.flow_data.flows
 
-        self.ax.set_xlabel("Время [мин]")
-        self.ax.set_ylabel("Расход [см3/мин]")
-        self.ax.set_title("Расход газа по времени Q(t)")
+        if times.size <= 1:
+            # If there's only one point, fit the view around it
+            self.ax.relim()
+            self.ax.autoscale_view()
+            return True
 
-        # Automatic scaling of axes
-        if len(times) > 1:
-            x_min = min(times)
-            x_max = max(times) * 1.05  # 5% shift to the right
-            self.ax.set_xlim(x_min, x_max)
+        # The times are increasing, only the flows have to be scanned
+        t_min, t_max = times[0], times[-1]
+        f_min, f_max = flows.min(), flows.max()
 
-            if len(flows) > 0:
-                y_min = min(flows) * 0.95 if min(flows) > 0 else min(flows) * 1.05
-                y_max = max(flows) * 1.05 if max(flows) > 0 else max(flows) * 0.95
-                self.ax.set_ylim(y_min, y_max)
+        x_low, x_high = self.ax.get_xlim()
+        y_low, y_high = self.ax.get_ylim()
+        if t_min >= x_low and t_max <= x_high and f_min >= y_low and f_max <= y_high:
+            return False
 
-        self.ax.minorticks_on()
-        self.ax.grid(True, which="major", linestyle="-", linewidth=0.8)
-        self.ax.grid(True, which="minor", linestyle="--", linewidth=0.5, alpha=0.5)
+        x_min = t_min
+        x_max = t_max * 1.05  # 5% shift to the right
+        self.ax.set_xlim(x_min, x_max)
 
-        if hasattr(self, "canvas"):
-            self.canvas.draw()
+        y_min = f_min * 0.95 if f_min > 0 else f_min * 1.05
+        y_max = f_max * 1.05 if f_max > 0 else f_max * 0.95
+        self.ax.set_ylim(y_min, y_max)
+        return True
 
     def _confirm_close(self):
         """
         Called by keyboard shortcuts (Ctrl+W, Ctrl+Q) to ask for exit confirmation.
         """
+        if self._ask_exit():
+            self._prepare_exit()
+            QtWidgets.QApplication.quit()
+
+    def _ask_exit(self):
+        """Asks the user to confirm the exit, returns True if confirmed."""
         reply = QMessageBox.question(
             self,
             "Подтвердить выход",
@@ -438,13 +689,24 @@ class GFRControlWindow(QtWidgets.QMainWindow):
             QMessageBox.Yes | QMessageBox.No,
             QMessageBox.No,
         )
-        if reply == QMessageBox.Yes:
-            # Save current port settings before closing
-            self._save_port_settings()
-            self._safe_close_connections()
-            QtWidgets.QApplication.quit()
+        return reply == QMessageBox.Yes
+
+    def _prepare_exit(self):
+        """Saves the port settings and turns the devices off before exiting."""
+        self._save_port_settings()
+        self._safe_close_connections()
+        self._close_flow_history()
+
+        if self.device_change_filter is not None:
+            QtWidgets.QApplication.instance().removeNativeEventFilter(
+                self.device_change_filter
+            )
+            self.device_change_filter = None
 
     def _open_connections(self):
+        if self.device_connector_thread is not None:
+            return  # The devices are being turned on already
+
         self._load_config_data()
 
         relay_port = self.combo_port_1.currentText()
@@ -458,16 +720,74 @@ class GFRControlWindow(QtWidgets.QMainWindow):
             )
             return
 
-        # 1. Connect to the relay
-        relay_err = self.relay_controller.TurnOn(
-            relay_port,
-            baudrate=self.relay_baudrate,
-            parity=self.relay_parity,
-            data_bit=self.relay_data_bit,
-            stop_bit=self.relay_stop_bit,
-            slave_id=self.relay_slave_id,
-            timeout=self.relay_timeout,
+        self._start_device_connector(
+            DeviceConnector(
+                self.relay_controller,
+                relay_port,
+                dict(
+                    baudrate=self.relay_baudrate,
+                    parity=self.relay_parity,
+                    data_bit=self.relay_data_bit,
+                    stop_bit=self.relay_stop_bit,
+                    slave_id=self.relay_slave_id,
+                    timeout=self.relay_timeout,
+                ),
+                self.gfr_controller,
+                gfr_port,
+                dict(
+                    baudrate=self.gfr_baudrate,
+                    parity=self.gfr_parity,
+                    data_bit=self.gfr_data_bit,
+                    stop_bit=self.gfr_stop_bit,
+                    slave_id=self.gfr_slave_id,
+                    timeout=self.gfr_timeout,
+                    inter_byte_timeout=self.gfr_inter_byte_timeout,
+                ),
+            )
         )
+
+    def _start_device_connector(self, connector):
+        """
+        Turns the devices on in a worker thread: connecting retries with pauses,
+        which would freeze the window for seconds if done in the GUI thread.
+        The results arrive in _on_relay_turned_on and _on_gfr_turned_on.
+        """
+        self.device_connector = connector
+        self.device_connector_thread = QtCore.QThread()
+        self.device_connector.moveToThread(self.device_connector_thread)
+
+        self.device_connector_thread.started.connect(self.device_connector.run)
+        self.device_connector.relay_turned_on.connect(self._on_relay_turned_on)
+        self.device_connector.gfr_turned_on.connect(self._on_gfr_turned_on)
+        self.device_connector.finished.connect(self._on_device_connector_finished)
+        self.device_connector_thread.finished.connect(
+            self.device_connector.deleteLater
+        )
+
+        # Don't let the user toggle the devices while they are being turned on
+        self.toggle_gfr_button.setEnabled(False)
+        self.device_connector_thread.start()
+
+    def _stop_device_connector(self):
+        """
+        Waits for the connection attempts in progress to finish, so the devices
+        can be turned off safely afterwards. Their results are discarded.
+        """
+        if self.device_connector_thread is None:
+            return
+
+        self.device_connector_thread.quit()
+        self.device_connector_thread.wait()
+
+        self.device_connector = None
+        self.device_connector_thread = None
+        self.toggle_gfr_button.setEnabled(True)
+
+    @QtCore.pyqtSlot(int, str)
+    def _on_relay_turned_on(self, relay_err, relay_port):
+        if self.device_connector is None:
+            return  # The attempt was cancelled
+
         if relay_err != MODBUS_OK:
             QMessageBox.critical(
                 self,
@@ -476,20 +796,14 @@ class GFRControlWindow(QtWidgets.QMainWindow):
                 "Убедитесь, что порт подключен и не занят другим устройством. "
                 "Если проблема не решена, попробуйте использовать другой порт.",
             )
-            return
         else:
             self._log_message(f"Реле подключено к порту {relay_port}.")
 
-        # 2. Connect to the Gas Flow Regulator
-        gfr_err = self.gfr_controller.TurnOn(
-            gfr_port,
-            baudrate=self.gfr_baudrate,
-            parity=self.gfr_parity,
-            data_bit=self.gfr_data_bit,
-            stop_bit=self.gfr_stop_bit,
-            slave_id=self.gfr_slave_id,
-            timeout=self.gfr_timeout,
-        )
+    @QtCore.pyqtSlot(int, str)
+    def _on_gfr_turned_on(self, gfr_err, gfr_port):
+        if self.device_connector is None:
+            return  # The attempt was cancelled
+
         if gfr_err != MODBUS_OK:
             self._gfr_show_error_msg()
             self.toggle_gfr_button.setChecked(False)
@@ -497,6 +811,7 @@ class GFRControlWindow(QtWidgets.QMainWindow):
         else:
             self._log_message(f"РРГ подключено к порту {gfr_port}.")
             self.toggle_gfr_button.setText("Выключить РРГ")
+            self._start_flow_poller()
 
             # After successful inclusion, make a small delay
             # before the first measurement, so the action is visible on the graph
@@ -510,23 +825,21 @@ class GFRControlWindow(QtWidgets.QMainWindow):
                 "Не удалось подключиться ни к одному устройству, проверьте порядок подключения устройств и повторите попытку."
             )
 
+    @QtCore.pyqtSlot()
+    def _on_device_connector_finished(self):
+        if self.device_connector is None:
+            return  # The attempt was cancelled
+
+        self._stop_device_connector()
+
+        if self.recovery_pending:
+            self._finish_recovery()
+
     def _force_update_graph(self):
+        """Requests the first measurement after turning the GFR on, and logs it."""
         if self.gfr_controller.IsConnected() and self.toggle_gfr_button.isChecked():
-            try:
-                err, flow = self.gfr_controller.GetFlow()
-                if err == MODBUS_OK:
-                    current_time = datetime.datetime.now()
-                    elapsed_minutes = (
-                        current_time - self.start_time
-                    ).total_seconds() / 60
-                    self.flow_data.append((elapsed_minutes, flow))
-                    self._update_plot_visualization()
-                    self._log_message(f"Расход после включения: {flow} [см3/мин]")
-            except Exception:
-                self._log_message(
-                    f"Ошибка при обновлении графика после включения, проверьте подключение к РРГ. {HELP_MESSAGE}"
-                )
-                self._perform_auto_recovery()
+            self.log_next_flow = True
+            self._update_graph()
 
     def _close_connections(self):
         """
@@ -535,6 +848,8 @@ class GFRControlWindow(QtWidgets.QMainWindow):
         """
         self.toggle_gfr_button.setChecked(False)
         self.toggle_gfr_button.setText("Включить РРГ")
+        self._stop_device_connector()
+        self._stop_flow_poller()
 
         # 1. Turn off the Gas Flow Regulator
         if self.gfr_controller.IsConnected():
@@ -555,54 +870,48 @@ class GFRControlWindow(QtWidgets.QMainWindow):
 
         # We want a gap in the graph instead of zero values when disconnected
         # Don't add any point, just update the visualization
+        self.plot_dirty = False
         self._update_plot_visualization()
 
     def _load_config_data(self):
-        relay_config_path = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)), "config", "relay.yaml"
-        )
-        gfr_config_path = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)), "config", "gfr.yaml"
-        )
         try:
-            self.gfr_config_dict = self.config_loader.load_config(gfr_config_path)
-            self.relay_config_dict = self.config_loader.load_config(relay_config_path)
+            self.gfr_config_dict = {
+                **GFR_DEFAULTS,
+                **self.config_loader.load_config(GFR_CONFIG_PATH),
+            }
+            self.relay_config_dict = {
+                **RELAY_DEFAULTS,
+                **self.config_loader.load_config(RELAY_CONFIG_PATH),
+            }
 
-            self.relay_baudrate = self.relay_config_dict.get(
-                "baudrate", RELAY_DEFAULT_BAUDRATE
-            )
-            self.relay_parity = self.relay_config_dict.get(
-                "parity", RELAY_DEFAULT_PARITY
-            )
-            self.relay_data_bit = self.relay_config_dict.get(
-                "data_bit", RELAY_DEFAULT_DATA_BIT
-            )
-            self.relay_stop_bit = self.relay_config_dict.get(
-                "stop_bit", RELAY_DEFAULT_STOP_BIT
-            )
-            self.relay_slave_id = self.relay_config_dict.get(
-                "slave_id", RELAY_DEFAULT_SLAVE_ID
-            )
-            self.relay_timeout = self.relay_config_dict.get(
-                "timeout", RELAY_DEFAULT_TIMEOUT
-            )
+            self.relay_baudrate = self.relay_config_dict["baudrate"]
+            self.relay_parity = self.relay_config_dict["parity"]
+            self.relay_data_bit = self.relay_config_dict["data_bit"]
+            self.relay_stop_bit = self.relay_config_dict["stop_bit"]
+            self.relay_slave_id = self.relay_config_dict["slave_id"]
+            self.relay_timeout = self.relay_config_dict["timeout"]
+
+            self.gfr_baudrate = self.gfr_config_dict["baudrate"]
+            self.gfr_parity = self.gfr_config_dict["parity"]
+            self.gfr_data_bit = self.gfr_config_dict["data_bit"]
+            self.gfr_stop_bit = self.gfr_config_dict["stop_bit"]
+            self.gfr_slave_id = self.gfr_config_dict["slave_id"]
+            self.gfr_timeout = self.gfr_config_dict["timeout"]
+            self.gfr_inter_byte_timeout = self.gfr_config_dict["inter_byte_timeout"]
+        except Exception as e:
+            self._log_message(f"Не удалось загрузить конфигурацию: {e}")
 
-            self.gfr_baudrate = self.gfr_config_dict.get(
-                "baudrate", GFR_DEFAULT_BAUDRATE
-            )
-            self.gfr_parity = self.gfr_config_dict.get("parity", GFR_DEFAULT_PARITY)
-            self.gfr_data_bit = self.gfr_config_dict.get(
-                "data_bit", GFR_DEFAULT_DATA_BIT
-            )
-            self.gfr_stop_bit = self.gfr_config_dict.get(
-                "stop_bit", GFR_DEFAULT_STOP_BIT
-            )
-            self.gfr_slave_id = self.gfr_config_dict.get(
-                "slave_id", GFR_DEFAULT_SLAVE_ID
-            )
-            self.gfr_timeout = self.gfr_config_dict.get("timeout", GFR_DEFAULT_TIMEOUT)
+    def _load_render_interval(self):
+        """
+        Returns the initial graph redraw interval [ms] from gfr.yaml. It is read
+        once at startup, later the user changes it in the window.
+        """
+        try:
+            gfr_config = self.config_loader.load_config(GFR_CONFIG_PATH)
+            return gfr_config.get("render_interval", PLOT_RENDER_TIME_TICK_MS)
         except Exception as e:
             self._log_message(f"Не удалось загрузить конфигурацию: {e}")
+            return PLOT_RENDER_TIME_TICK_MS
 
     def _get_available_ports(self):
         ports = serial.tools.list_ports.comports()
@@ -619,18 +928,17 @@ class GFRControlWindow(QtWidgets.QMainWindow):
         return sorted(ports, key=extract_number)
 
     def _toggle_ui(self):
-        if len(self.available_ports) < 2:
+        enabled = len(self.available_ports) >= 2
+        if not enabled:
             self._log_message(
                 "Недостаточно доступных портов. Графический интерфейс отключен."
             )
 
-            self.combo_port_1.setEnabled(False)
-            self.combo_port_2.setEnabled(False)
-            self.central_widget.setEnabled(False)
-        else:
-            self.combo_port_1.setEnabled(True)
-            self.combo_port_2.setEnabled(True)
-            self.central_widget.setEnabled(True)
+        # Disabling the central widget disables all the controls inside it,
+        # only the port selectors live outside of it (in the toolbar)
+        self.combo_port_1.setEnabled(enabled)
+        self.combo_port_2.setEnabled(enabled)
+        self.central_widget.setEnabled(enabled)
 
     def _create_toolbar(self):
         self.toolbar = QtWidgets.QToolBar("Выбор COM-порта", self)
@@ -669,11 +977,26 @@ class GFRControlWindow(QtWidgets.QMainWindow):
         self.combo_port_1.currentIndexChanged.connect(self._on_combo_changed)
         self.combo_port_2.currentIndexChanged.connect(self._on_combo_changed)
 
-    def _refresh_ports(self, show_message=True):
-        self.available_ports: list[str] = self._get_available_ports()
+    def _apply_available_ports(self, ports):
+        """
+        Stores the new list of available ports. The combo boxes and the UI
+        state are only updated when the set of ports actually changed.
+        """
+        # The connection check compares against the last list seen anywhere,
+        # otherwise a port dropped by a manual refresh would later be reported
+        # as a disconnection
+        self.previous_ports = frozenset(ports)
+
+        if self.previous_ports == frozenset(self.available_ports):
+            return
+
+        self.available_ports: list[str] = ports
         self._update_combo_boxes(initial=True)
         self._toggle_ui()
 
+    def _refresh_ports(self, show_message=True):
+        self._apply_available_ports(self._get_available_ports())
+
         if not self.available_ports:
             QMessageBox.warning(
                 self,
@@ -711,17 +1034,19 @@ class GFRControlWindow(QtWidgets.QMainWindow):
         current1 = self.combo_port_1.currentText()
         current2 = self.combo_port_2.currentText()
 
+        # Nothing to rebuild if neither the selections nor the ports changed
+        # since the last sync
+        combo_key = (current1, current2, tuple(self.available_ports))
+        if not initial and combo_key == self._last_combo_key:
+            return
+
         # Block signals to prevent cascading updates
         self.combo_port_1.blockSignals(True)
         self.combo_port_2.blockSignals(True)
 
-        # Clear both combo boxes
-        self.combo_port_1.clear()
-        self.combo_port_2.clear()
-
         # Always show all available ports in both combo boxes
-        self.combo_port_1.addItems(self.available_ports)
-        self.combo_port_2.addItems(self.available_ports)
+        self._sync_combo_items(self.combo_port_1, self.available_ports)
+        self._sync_combo_items(self.combo_port_2, self.available_ports)
 
         # Restore previous selections if they still exist in the available ports
         if current1 and current1 in self.available_ports:
@@ -738,6 +1063,34 @@ class GFRControlWindow(QtWidgets.QMainWindow):
         self.combo_port_1.blockSignals(False)
         self.combo_port_2.blockSignals(False)
 
+        self._last_combo_key = (
+            self.combo_port_1.currentText(),
+            self.combo_port_2.currentText(),
+            tuple(self.available_ports),
+        )
+
+    @staticmethod
+    def _sync_combo_items(combo, items):
+        """
+        Makes the combo box list exactly the given items, touching only the
+        entries that differ. When nothing changed (e.g. the user just picked
+        another port) the combo box model is not modified at all.
+        """
+        if [combo.itemText(i) for i in range(combo.count())] == items:
+            return
+
+        for index in reversed(range(combo.count())):
+            if combo.itemText(index) not in items:
+                combo.removeItem(index)
+
+        for index, item in enumerate(items):
+            if combo.itemText(index) == item:
+                continue
+            existing = combo.findText(item)
+            if existing >= 0:
+                combo.removeItem(existing)
+            combo.insertItem(index, item)
+
     def _on_combo_changed(self):
         self._update_combo_boxes()
 
@@ -786,6 +1139,23 @@ class GFRControlWindow(QtWidgets.QMainWindow):
         self.save_image_button = QtWidgets.QPushButton("Сохранить график PNG", self)
         self.save_image_button.clicked.connect(self._save_graph_as_image)
         graph_controls_layout.addWidget(self.save_image_button)
+
+        # How often the graph is redrawn, the flow is polled independently of it
+        graph_controls_layout.addWidget(
+            QtWidgets.QLabel("Обновление графика:", self)
+        )
+        self.render_interval_spin_box = QtWidgets.QSpinBox(self)
+        self.render_interval_spin_box.setRange(
+            PLOT_RENDER_TIME_TICK_MIN_MS, PLOT_RENDER_TIME_TICK_MAX_MS
+        )
+        self.render_interval_spin_box.setSingleStep(100)
+        self.render_interval_spin_box.setSuffix(" мс")
+        self.render_interval_spin_box.setValue(self._load_render_interval())
+        self.render_interval_spin_box.setToolTip(
+            "Интервал перерисовки графика. Большее значение снижает нагрузку "
+            "на процессор, меньшее делает график более плавным"
+        )
+        graph_controls_layout.addWidget(self.render_interval_spin_box)
         layout.addLayout(graph_controls_layout)
 
         # Create a splitter to allow resizing between graph and console
@@ -811,6 +1181,7 @@ class GFRControlWindow(QtWidgets.QMainWindow):
         # Set minimum heights for better usability
         self.graph_container.setMinimumHeight(300)
         self.log_console.setMinimumHeight(100)
+        self.log_console.document().setMaximumBlockCount(LOG_CONSOLE_MAX_LINES)
 
         # Add widgets to splitter
         self.splitter.addWidget(self.graph_container)
@@ -819,10 +1190,22 @@ class GFRControlWindow(QtWidgets.QMainWindow):
         # Set initial sizes (70% graph, 30% console)
         self.splitter.setSizes([700, 300])
 
-        # Start graph timer
+        # Graph timer, started together with the flow poller
         self.graph_timer = QtCore.QTimer(self)
         self.graph_timer.timeout.connect(self._update_graph)
-        self.graph_timer.start(PLOT_UPDATE_TIME_TICK_MS)
+
+        # Start render timer
+        self.render_timer = QtCore.QTimer(self)
+        self.render_timer.timeout.connect(self._render_graph)
+        self.render_timer.start(self.render_interval_spin_box.value())
+        self.render_interval_spin_box.valueChanged.connect(
+            self.render_timer.setInterval
+        )
+
+        # Start log flush timer
+        self.log_flush_timer = QtCore.QTimer(self)
+        self.log_flush_timer.timeout.connect(self._flush_log)
+        self.log_flush_timer.start(LOG_FLUSH_TIME_TICK_MS)
 
     @QtCore.pyqtSlot()
     def _toggle_gfr(self):
@@ -870,7 +1253,7 @@ class GFRControlWindow(QtWidgets.QMainWindow):
         console_message = (
             f"[{datetime.datetime.now().strftime('%d.%m.%Y %H:%M:%S')}] {message}"
         )
-        self.log_console.append(console_message)
+        self.log_buffer.append(console_message)
 
         # Append the same formatted message to the log file
         try:
@@ -880,54 +1263,52 @@ class GFRControlWindow(QtWidgets.QMainWindow):
         except Exception as e:
             # Log an error to the console if file writing fails
             error_message = f"[ОШИБКА ЗАПИСИ В ЛОГ {datetime.datetime.now().strftime('%d.%m.%Y %H:%M:%S')}] Не удалось записать в {self.log_file_path}: {e}"
-            self.log_console.append(error_message)
-
-    def _gfr_show_error_msg(self):
-        gfr_error = self.gfr_controller.GetLastError()
+            self.log_buffer.append(error_message)
 
-        if not gfr_error:
+    @QtCore.pyqtSlot()
+    def _flush_log(self):
+        """Shows the buffered log messages in the console with a single append."""
+        if not self.log_buffer:
             return
 
-        if isinstance(gfr_error, str):
-            QMessageBox.critical(
-                self,
-                "Ошибка РРГ",
-                f"{self.gfr_controller.GetLastError()}",
-            )
-        elif isinstance(gfr_error, int) and gfr_error == MODBUS_ERROR:
-            QMessageBox.critical(
-                self,
-                "Ошибка РРГ",
-                "РРГ не подключено",
-            )
-        else:
-            QMessageBox.critical(self, "Ошибка РРГ", "Неизвестная ошибка")
+        self.log_console.append("\n".join(self.log_buffer))
+        self.log_buffer.clear()
+
+    def _gfr_show_error_msg(self):
+        self._show_device_error(self.gfr_controller, "Ошибка РРГ", "РРГ не подключено")
 
     def _relay_show_error_msg(self):
-        relay_error = self.relay_controller.GetLastError()
+        self._show_device_error(
+            self.relay_controller, "Ошибка реле", "Реле не подключено"
+        )
 
-        if not relay_error:
+    def _show_device_error(self, controller, title, not_connected_message):
+        """Shows the last error of the device controller, if there is one."""
+        error = controller.GetLastError()
+
+        if not error:
+            # The device was turned off without an error, but it is needed
+            if controller.IsDisconnected():
+                QMessageBox.critical(self, title, not_connected_message)
             return
 
-        if isinstance(relay_error, str):
-            QMessageBox.critical(
-                self,
-                "Ошибка реле",
-                f"{self.relay_controller.GetLastError()}",
-            )
-        elif isinstance(relay_error, int) and relay_error == MODBUS_ERROR:
-            QMessageBox.critical(self, "Ошибка реле", "Реле не подключено")
+        if isinstance(error, str):
+            message = error
+        elif isinstance(error, int) and error == MODBUS_ERROR:
+            message = not_connected_message
         else:
-            QMessageBox.critical(self, "Ошибка реле", "Неизвестная ошибка")
+            message = "Неизвестная ошибка"
+
+        QMessageBox.critical(self, title, message)
 
     def _clear_graph(self):
-        self.flow_data = []
-        self.start_time = datetime.datetime.now()
-        self.ax.clear()
-        self.ax.set_xlabel("Время [мин]")
-        self.ax.set_ylabel("Расход [см3/мин]")
-        self.ax.set_title("Расход газа по времени Q(t)")
-        self.ax.grid(True)
+        self.flow_data.clear()
+        self._reset_flow_history()
+        self.plot_dirty = False
+        self.start_time = time.monotonic()
+        self.line.set_data([], [])
+        self.ax.relim()
+        self.ax.autoscale_view()
         self.canvas.draw()
         self._log_message("График очищен. Начинаем новые измерения.")
 
@@ -945,10 +1326,14 @@ class GFRControlWindow(QtWidgets.QMainWindow):
         file_name = f"flow_data_{now}.csv"
 
         try:
+            # The history file is already a complete CSV, it is just copied
             with open(file_name, "w") as f:
-                f.write("Время [мин],Расход [см3/мин]\n")
-                for time, flow in self.flow_data:
-                    f.write(f"{time:.2f},{flow:.3f}\n")
+                self.flow_history_file.seek(0)
+                try:
+                    shutil.copyfileobj(self.flow_history_file, f)
+                finally:
+                    # New measurements are appended at the end again
+                    self.flow_history_file.seek(0, os.SEEK_END)
 
             self._log_message(f"Данные сохранены в файл: {file_name}")
 
@@ -981,8 +1366,19 @@ class GFRControlWindow(QtWidgets.QMainWindow):
         file_name = f"flow_graph_{now}.png"
 
         try:
-            self.figure.tight_layout()
-            self.figure.savefig(file_name, format="png", dpi=300, bbox_inches="tight")
+            # Include the measurements that were not drawn yet
+            self._render_graph()
+
+            # Animated artists are skipped by savefig, render the line normally
+            self.line.set_animated(False)
+            try:
+                self.figure.tight_layout()
+                self.figure.savefig(
+                    file_name, format="png", dpi=300, bbox_inches="tight"
+                )
+            finally:
+                self.line.set_animated(True)
+                self.canvas.draw()
 
             self._log_message(f"График сохранен в файл: {file_name}")
 
@@ -1011,13 +1407,11 @@ class GFRControlWindow(QtWidgets.QMainWindow):
             self.gfr_controller.IsConnected()
             and self.toggle_gfr_button.isChecked()
             and not self.measurement_stalled
+            and self.device_connector is None
         ):
 
-            current_time = datetime.datetime.now()
             # Calculate seconds since last measurement
-            time_since_last_measurement = (
-                current_time - self.last_measurement_time
-            ).total_seconds()
+            time_since_last_measurement = time.monotonic() - self.last_measurement_time
 
             # If more than 10 seconds have passed without a measurement, consider it stalled
             if time_since_last_measurement > 10:
@@ -1063,25 +1457,30 @@ class GFRControlWindow(QtWidgets.QMainWindow):
             self.toggle_gfr_button.setChecked(True)
             self.toggle_gfr_button.blockSignals(False)
 
-            # Reopen connections
+            # Reopen connections, the result is checked in _finish_recovery
+            self.recovery_pending = True
             self._open_connections()
 
-            if self.gfr_controller.IsConnected():
-                self._log_message(
-                    "Соединение восстановлено успешно. Измерения продолжаются."
-                )
-                # Restart the graph timer to resume measurements
-                if hasattr(self, "graph_timer") and self.graph_timer is not None:
-                    self.graph_timer.start(PLOT_UPDATE_TIME_TICK_MS)
-            else:
-                self._log_message("Не удалось восстановить соединение автоматически.")
-                # Now show message to user since auto-recovery failed
-                self._show_recovery_failed_message()
+            if self.device_connector is None:
+                self._finish_recovery()  # Nothing to wait for
 
         # Reset the stalled flag to allow future recovery attempts
         self.measurement_stalled = False
         # Update the last measurement time to avoid immediate re-triggering
-        self.last_measurement_time = datetime.datetime.now()
+        self.last_measurement_time = time.monotonic()
+
+    def _finish_recovery(self):
+        """Checks the result of reopening the connections during auto-recovery."""
+        self.recovery_pending = False
+
+        if self.gfr_controller.IsConnected():
+            self._log_message(
+                "Соединение восстановлено успешно. Измерения продолжаются."
+            )
+        else:
+            self._log_message("Не удалось восстановить соединение автоматически.")
+            # Now show message to user since auto-recovery failed
+            self._show_recovery_failed_message()
 
     def _show_recovery_failed_message(self):
         """
@@ -1124,12 +1523,7 @@ class GFRControlWindow(QtWidgets.QMainWindow):
         This is called before the application exits.
         """
         try:
-            config_dir = os.path.join(
-                os.path.dirname(os.path.dirname(__file__)), "config"
-            )
-            os.makedirs(config_dir, exist_ok=True)
-
-            ports_config_path = os.path.join(config_dir, "ports.yaml")
+            os.makedirs(CONFIG_DIR, exist_ok=True)
 
             ports_config = {
                 "relay_port": self.combo_port_1.currentText(),
@@ -1138,7 +1532,7 @@ class GFRControlWindow(QtWidgets.QMainWindow):
 
             # Only save if we have valid ports selected
             if ports_config["relay_port"] and ports_config["gfr_port"]:
-                self.config_loader.save_config(ports_config_path, ports_config)
+                self.config_loader.save_config(PORTS_CONFIG_PATH, ports_config)
                 self._log_message("Настройки портов сохранены")
 
         except Exception as e:
@@ -1150,12 +1544,8 @@ class GFRControlWindow(QtWidgets.QMainWindow):
         Called during application startup.
         """
         try:
-            ports_config_path = os.path.join(
-                os.path.dirname(os.path.dirname(__file__)), "config", "ports.yaml"
-            )
-
-            if os.path.exists(ports_config_path):
-                ports_config = self.config_loader.load_config(ports_config_path)
+            if os.path.exists(PORTS_CONFIG_PATH):
+                ports_config = self.config_loader.load_config(PORTS_CONFIG_PATH)
 
                 if ports_config and isinstance(ports_config, dict):
                     self.saved_relay_port = ports_config.get("relay_port")
@@ -207,6 +207,14 @@ def clean_error_state():
     reset_last_error()
 
 
+@pytest.fixture(autouse=True)
+def temporary_log_dir(monkeypatch, tmp_path):
+    """Fixture that makes the windows write their logs and flow history to tmp_path."""
+    monkeypatch.setattr("gui.window.LOG_DIR", str(tmp_path))
+
+    return tmp_path
+
+
 @pytest.fixture(scope="session", autouse=True)
 def cleanup_all_test_files():
     yield
@@ -135,7 +135,8 @@ def test_gfr_window_dialog_auto_closing(qapp, auto_close_dialogs):
             window = GFRControlWindow()
 
             if hasattr(window, "_save_data_to_csv"):
-                window.flow_data = [(0.1, 10), (0.2, 20)]
+                window._record_flow(0.1, 10)
+                window._record_flow(0.2, 20)
                 with patch("builtins.open", create=True):
                     window._save_data_to_csv()
 
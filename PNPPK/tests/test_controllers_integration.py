@@ -76,11 +76,11 @@ class TestControllersIntegration:
             )
 
         # 2. Set gas flow
-        gfr_controller._gfr.write_register.reset_mock()
+        gfr_controller._gfr.write_registers.reset_mock()
         gfr_controller.SetFlow(30.5)
 
-        # Assert flow was set via write_register (high and low bytes)
-        assert gfr_controller._gfr.write_register.call_count == 2
+        # Assert flow was set via a single write_registers (high and low words)
+        assert gfr_controller._gfr.write_registers.call_count == 1
 
         with patch(
             "core.utils.modbus_utils.modbus_operation",
@@ -99,7 +99,7 @@ class TestControllersIntegration:
         gfr_controller, relay_controller = mock_connected_controllers
 
         # Reset mocks
-        gfr_controller._gfr.write_register.reset_mock()
+        gfr_controller._gfr.write_registers.reset_mock()
         gfr_controller._gfr.read_holding_registers.reset_mock()
         relay_controller._relay.write_register.reset_mock()
 
@@ -142,8 +142,8 @@ class TestControllersIntegration:
 
         # Verify operations were performed
         assert (
-            gfr_controller._gfr.write_register.call_count >= 10
-        )  # 5 flows x 2 registers
+            gfr_controller._gfr.write_registers.call_count >= 5
+        )  # 5 flows, both registers at once
         assert (
             gfr_controller._gfr.read_holding_registers.call_count >= 5
         )  # 5 GetFlow calls
@@ -211,7 +211,7 @@ class TestControllersIntegration:
         assert relay_controller.IsConnected()
 
         # Operations on GFR should fail or return error
-        with patch("core.utils.modbus_utils.set_last_error") as mock_set_error:
+        with patch("core.utils.modbus_utils._set_last_error") as mock_set_error:
             with patch(
                 "core.utils.modbus_utils.get_last_error",
                 return_value="Device not initialized",
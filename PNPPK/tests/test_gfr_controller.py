@@ -4,14 +4,15 @@ import time
 import pytest
 import psutil
 import logging
-from unittest.mock import MagicMock, patch, call
+from unittest.mock import MagicMock, patch
 
 # Add project root to sys.path
 root_path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, root_path)
 
+import core.gas_flow_regulator.controller as gfr_controller_module
 from core.gas_flow_regulator.controller import GFRController
-from core.utils import MODBUS_OK, MODBUS_ERROR
+from core.utils import MODBUS_OK, MODBUS_ERROR, set_last_error
 from tests.conftest import DEFAULT_GFR_SLAVE_ID
 from tests.modbus_utils_mocks import mock_gfr_controller
 
@@ -135,6 +136,7 @@ class TestGFRControllerUnit:
                 gfr_config["stop_bit"],
                 gfr_config["slave_id"],
                 gfr_config["timeout"],
+                None,
             )
 
     def test_turnoff_calls_close(self, gfr_controller):
@@ -148,24 +150,53 @@ class TestGFRControllerUnit:
                 gfr_controller.TurnOff()
                 mock_close.assert_called_once()
 
+    def test_init_waits_only_after_recent_close(self, gfr_controller, gfr_config):
+        init_args = (
+            "COM1",
+            gfr_config["baudrate"],
+            gfr_config["parity"],
+            gfr_config["data_bit"],
+            gfr_config["stop_bit"],
+            gfr_config["slave_id"],
+            gfr_config["timeout"],
+        )
+
+        with patch(
+            "core.gas_flow_regulator.controller.ModbusSerialClient"
+        ) as mock_client_constructor, patch(
+            "core.gas_flow_regulator.controller.sleep"
+        ) as mock_sleep:
+            mock_client_constructor.return_value.connect.return_value = True
+
+            # The port has never been closed, no pause before opening it
+            gfr_controller._init(*init_args)
+            mock_sleep.assert_not_called()
+
+            # Reopening right after closing waits for the rest of the delay
+            gfr_controller._close()
+            gfr_controller._init(*init_args)
+            mock_sleep.assert_called_once()
+            assert 0 < mock_sleep.call_args.args[0] <= GFRController.REOPEN_DELAY
+
     def test_setflow_writes_to_registers(self, connected_gfr_controller):
         connected_gfr_controller.SetFlow(30.5)
 
         # Value should be 30.5 * 1000 = 30500
         # High reg = 0, Low reg = 30500
-        connected_gfr_controller._gfr.write_register.assert_has_calls(
-            [
-                call(
-                    connected_gfr_controller.MODBUS_REGISTER_SETPOINT_HIGH,
-                    0,
-                    slave=DEFAULT_GFR_SLAVE_ID,
-                ),
-                call(
-                    connected_gfr_controller.MODBUS_REGISTER_SETPOINT_LOW,
-                    30500,
-                    slave=DEFAULT_GFR_SLAVE_ID,
-                ),
-            ]
+        connected_gfr_controller._gfr.write_registers.assert_called_once_with(
+            connected_gfr_controller.MODBUS_REGISTER_SETPOINT_HIGH,
+            [0, 30500],
+            slave=DEFAULT_GFR_SLAVE_ID,
+        )
+
+    def test_setflow_negative_value(self, connected_gfr_controller):
+        connected_gfr_controller.SetFlow(-1.0)
+
+        # -1000 as a signed 32-bit value is 0xFFFFFC18
+        connected_gfr_controller._gfr.write_registers.assert_called_once_with(
+            connected_gfr_controller.MODBUS_REGISTER_SETPOINT_HIGH,
+            [0xFFFF, 0xFC18],
+            slave=DEFAULT_GFR_SLAVE_ID,
         )
 
     def test_getflow_reads_from_register(self, connected_gfr_controller):
@@ -183,6 +214,20 @@ class TestGFRControllerUnit:
             assert result == MODBUS_OK
             assert flow == 30.0  # 300 / 10
 
+    def test_getflow_negative_value(self, connected_gfr_controller):
+        connected_gfr_controller._gfr.read_holding_registers.return_value = MagicMock(
+            registers=[0xFFFF]
+        )
+
+        with patch(
+            "core.utils.modbus_utils.modbus_operation",
+            lambda *args, **kwargs: lambda f: f,
+        ):
+            result, flow = connected_gfr_controller.GetFlow()
+
+            assert result == MODBUS_OK
+            assert flow == -0.1  # int16 -1 / 10
+
     def test_getflow_error_handling(self, connected_gfr_controller):
         connected_gfr_controller._gfr.read_holding_registers.return_value = MagicMock(
             registers=[]
@@ -211,6 +256,68 @@ class TestGFRControllerUnit:
             assert result == MODBUS_ERROR
             assert flow == 0
 
+    def test_getflow_exception_response(self, connected_gfr_controller):
+        from pymodbus.pdu import ExceptionResponse
+
+        # The device answered with "Illegal Data Address"
+        connected_gfr_controller._gfr.read_holding_registers.return_value = (
+            ExceptionResponse(0x03, 0x02)
+        )
+
+        result, flow = connected_gfr_controller.GetFlow()
+
+        assert result == MODBUS_ERROR
+        assert flow == 0
+
+    def test_getflow_error_after_recovered_failure(self, connected_gfr_controller):
+        client = connected_gfr_controller._gfr
+
+        # A write times out (the client is dropped), then succeeds after reconnecting
+        client.write_registers.side_effect = Exception("Timeout")
+        assert connected_gfr_controller.SetFlow(10) == MODBUS_ERROR
+        assert "Timeout" in connected_gfr_controller.GetLastError()
+
+        connected_gfr_controller._gfr = client
+        client.write_registers.side_effect = None
+        assert connected_gfr_controller.SetFlow(10) == MODBUS_OK
+
+        # A reply without registers reports its own error, not the old timeout
+        client.read_holding_registers.return_value = MagicMock(spec=[])
+        result, _ = connected_gfr_controller.GetFlow()
+
+        assert result == MODBUS_ERROR
+        error = connected_gfr_controller.GetLastError()
+        assert "Получение расхода" in error
+        assert "Timeout" not in error
+
+    def test_getflow_error_kept_when_global_error_changes(
+        self, connected_gfr_controller
+    ):
+        client = connected_gfr_controller._gfr
+        client.read_holding_registers.return_value = MagicMock(spec=[])
+        make_flow_reader = gfr_controller_module._make_flow_reader
+
+        def make_interrupted_flow_reader(*args):
+            read_flow = make_flow_reader(*args)
+
+            def interrupted_read_flow():
+                result = read_flow()
+                # Another device succeeds in the GUI thread before GetFlow returns
+                set_last_error("")
+                return result
+
+            return interrupted_read_flow
+
+        with patch.object(
+            gfr_controller_module,
+            "_make_flow_reader",
+            side_effect=make_interrupted_flow_reader,
+        ):
+            result, _ = connected_gfr_controller.GetFlow()
+
+        assert result == MODBUS_ERROR
+        assert "Ответ без данных" in connected_gfr_controller.GetLastError()
+
     def test_is_connected(self, gfr_controller):
         assert not gfr_controller.IsConnected()
 
@@ -243,14 +350,9 @@ class TestGFRControllerFunctional:
             high = int_value >> 16
             low = int_value & 0xFFFF
 
-            connected_gfr_controller._gfr.write_register.assert_any_call(
+            connected_gfr_controller._gfr.write_registers.assert_any_call(
                 connected_gfr_controller.MODBUS_REGISTER_SETPOINT_HIGH,
-                high,
-                slave=DEFAULT_GFR_SLAVE_ID,
-            )
-            connected_gfr_controller._gfr.write_register.assert_any_call(
-                connected_gfr_controller.MODBUS_REGISTER_SETPOINT_LOW,
-                low,
+                [high, low],
                 slave=DEFAULT_GFR_SLAVE_ID,
             )
 
@@ -327,18 +429,21 @@ class TestGFRControllerIntegration:
             # Reset the error state
             reset_last_error()
 
-            # The real modbus_operation decorator would catch exceptions and set LAST_ERROR
-            # So we'll need to set it manually in our test
-            expected_gfr_error = f"РРГ: Получение расхода (чтение из регистра {controller.MODBUS_REGISTER_FLOW}) не удалось: {expected_error_msg}"
+            # The modbus_operation decorator catches the exception and keeps
+            # the message for the controller
+            expected_gfr_error = f"РРГ: Получение расхода (чтение из регистра {controller.MODBUS_REGISTER_FLOW}) не удалось. {expected_error_msg}"
 
             # Call GetFlow but expect it to fail and set the error
             result = controller.GetFlow()
-            set_last_error(expected_gfr_error)
 
             # Now verify the assertions
             assert result == MODBUS_ERROR
             assert controller.GetLastError() == expected_gfr_error
 
+            # An error of another device doesn't replace it
+            set_last_error("РЕЛЕ: Выключение не удалось.")
+            assert controller.GetLastError() == expected_gfr_error
+
             # Verify read_holding_registers was called with the correct parameters
             mock_gfr.read_holding_registers.assert_called_once_with(
                 address=controller.MODBUS_REGISTER_FLOW, count=1, slave=1
@@ -2,7 +2,7 @@ import os
 import sys
 import pytest
 import logging
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 # Add project root to sys.path
 root_path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -15,6 +15,8 @@ from core.utils.modbus_utils import (
     get_last_error,
     reset_last_error,
     modbus_operation,
+    retry_with_backoff,
+    capture_pymodbus_error,
 )
 
 # Mock logger to capture logging
@@ -504,5 +506,66 @@ def test_modbus_operation_async_method_simulation_dirty():
     assert get_last_error() == ""
 
 
+# ============================================================================
+# Retry with backoff tests
+# ============================================================================
+
+
+def test_retry_with_backoff_success_after_failures_clean():
+    """Clean test: the delays grow between the attempts until func succeeds."""
+    func = MagicMock(side_effect=[False, Exception("timeout"), True])
+
+    with patch("core.utils.modbus_utils.time.sleep") as mock_sleep:
+        result, error_message = retry_with_backoff(
+            func, attempts=3, base_delay=0.1, jitter=0.5
+        )
+
+    assert result is True
+    assert error_message == "timeout"
+    assert func.call_count == 3
+    delays = [c.args[0] for c in mock_sleep.call_args_list]
+    assert len(delays) == 2
+    assert 0.1 <= delays[0] <= 0.15
+    assert 0.2 <= delays[1] <= 0.3
+
+
+def test_retry_with_backoff_all_attempts_failed_dirty():
+    """Dirty test: no pause after the last attempt, the cap limits the delay."""
+    func = MagicMock(side_effect=Exception("port busy"))
+
+    with patch("core.utils.modbus_utils.time.sleep") as mock_sleep:
+        result, error_message = retry_with_backoff(
+            func, attempts=4, base_delay=1.0, max_delay=1.5, jitter=0.0
+        )
+
+    assert not result
+    assert error_message == "port busy"
+    assert func.call_count == 4
+    assert [c.args[0] for c in mock_sleep.call_args_list] == [1.0, 1.5, 1.5]
+
+
+def test_capture_pymodbus_error_clean():
+    """Clean test: only the records of the current thread are captured."""
+    import threading
+
+    pymodbus_logger = logging.getLogger("pymodbus.client.sync")
+
+    with capture_pymodbus_error() as pymodbus_error:
+        pymodbus_logger.info("not captured below WARNING")
+        pymodbus_logger.error("could not open port COM1")
+
+        other = threading.Thread(
+            target=pymodbus_logger.error, args=("from another thread",)
+        )
+        other.start()
+        other.join()
+
+    assert pymodbus_error.last == "could not open port COM1"
+
+    # The handler is detached on exit
+    pymodbus_logger.error("after the block")
+    assert pymodbus_error.last == "could not open port COM1"
+
+
 if __name__ == "__main__":
     pytest.main(["-xvs", __file__])
@@ -5,6 +5,7 @@ import pytest
 import psutil
 import logging
 import tempfile
+import numpy as np
 from PyQt5 import QtWidgets
 from unittest.mock import MagicMock, patch, mock_open
 
@@ -14,6 +15,9 @@ sys.path.insert(0, root_path)
 
 # Import after path setup
 from gui.window import GFRControlWindow
+from gui.device_change_filter import DeviceChangeFilter
+from gui.flow_buffer import FlowBuffer, decimate_peaks
+from gui.flow_poller import GFRPoller
 from core.gas_flow_regulator.controller import GFRController
 from core.relay.controller import RelayController
 from core.yaml_config_loader import YAMLConfigLoader
@@ -32,6 +36,15 @@ pytestmark = pytest.mark.skipif(
 )
 
 
+def set_flow_points(window, points):
+    """Replaces the measurements recorded by the window with the given points."""
+    window.flow_data.clear()
+    window._reset_flow_history()
+
+    for elapsed_minutes, flow in points:
+        window._record_flow(elapsed_minutes, flow)
+
+
 # ============================================================================
 # QApplication setup - important for PyQt tests
 # ============================================================================
@@ -346,6 +359,13 @@ def test_com_port_handling_functional(gfr_window, mock_ports):
     assert gfr_window.combo_port_1.count() == 1
     assert gfr_window.combo_port_1.itemText(0) == "COM3"
 
+    # Refreshing again with the same ports leaves the combo boxes alone
+    with patch("PyQt5.QtWidgets.QMessageBox.information"), patch(
+        "PyQt5.QtWidgets.QMessageBox.warning"
+    ), patch.object(gfr_window, "_update_combo_boxes") as mock_update:
+        gfr_window._refresh_ports()
+        mock_update.assert_not_called()
+
 
 @pytest.mark.skip(reason="Problems with calling real methods in the test")
 def test_open_close_connections_functional(
@@ -384,7 +404,7 @@ def test_graph_management_functional(gfr_window):
     assert gfr_window.flow_data == []
 
     # Add some data points
-    gfr_window.flow_data = [(0.1, 10), (0.2, 20), (0.3, 30)]
+    set_flow_points(gfr_window, [(0.1, 10), (0.2, 20), (0.3, 30)])
 
     # Test clearing the graph
     with patch.object(gfr_window, "_log_message") as mock_log:
@@ -397,7 +417,7 @@ def test_graph_management_functional(gfr_window):
 
 @pytest.mark.skip(reason="Problems with calling method figure.savefig")
 def test_data_saving_functional(gfr_window, temp_csv_file, temp_png_file):
-    gfr_window.flow_data = [(0.1, 10), (0.2, 20), (0.3, 30)]
+    set_flow_points(gfr_window, [(0.1, 10), (0.2, 20), (0.3, 30)])
 
     class MockFigure:
         def __init__(self):
@@ -430,7 +450,7 @@ def test_device_disconnection_detection_functional(gfr_window, mock_gfr_controll
     gfr_window._get_available_ports = MagicMock(return_value=["COM1"])
 
     # Set up initial state
-    gfr_window.previous_port_count = 2
+    gfr_window.previous_ports = frozenset({"COM1", "COM2"})
     gfr_window.toggle_gfr_button.setChecked(True)
 
     # Patch the handle_device_disconnection method
@@ -445,6 +465,118 @@ def test_device_disconnection_detection_functional(gfr_window, mock_gfr_controll
     gfr_window._get_available_ports = original_get_ports
 
 
+def test_replaced_port_detected_as_disconnection_functional(gfr_window):
+    """Functional test: A port replaced by another one is a disconnection too."""
+    gfr_window.previous_ports = frozenset({"COM1", "COM2"})
+    gfr_window._get_available_ports = MagicMock(return_value=["COM1", "COM3"])
+
+    with patch.object(gfr_window, "_handle_device_disconnection") as mock_handle:
+        gfr_window._check_device_connections()
+        mock_handle.assert_called_once()
+
+    assert gfr_window.previous_ports == {"COM1", "COM3"}
+
+
+def test_refreshed_ports_not_reported_as_disconnection_functional(gfr_window):
+    """Functional test: A port already gone at a manual refresh is not a disconnection later."""
+    gfr_window.previous_ports = frozenset({"COM1", "COM2"})
+    gfr_window._get_available_ports = MagicMock(return_value=["COM1", "COM3"])
+
+    gfr_window._refresh_ports(show_message=False)
+    assert gfr_window.previous_ports == {"COM1", "COM3"}
+
+    with patch.object(gfr_window, "_handle_device_disconnection") as mock_handle:
+        gfr_window._check_device_connections()
+        mock_handle.assert_not_called()
+
+
+def test_port_hotplug_detection_functional(gfr_window):
+    """Functional test: Newly plugged ports show up without a manual refresh."""
+    gfr_window._get_available_ports = MagicMock(return_value=["COM1", "COM2", "COM3"])
+
+    gfr_window._check_device_connections()
+
+    assert gfr_window.available_ports == ["COM1", "COM2", "COM3"]
+    assert gfr_window.combo_port_1.findText("COM3") >= 0
+    assert gfr_window.combo_port_2.findText("COM3") >= 0
+    gfr_window._get_available_ports.assert_called_once()
+
+
+def test_ports_enumerated_on_device_change_functional(gfr_window):
+    """Functional test: With device notifications the ports are read only after a change."""
+    gfr_window.device_change_filter = DeviceChangeFilter(gfr_window._on_devices_changed)
+    gfr_window.ports_dirty = False
+    gfr_window._get_available_ports = MagicMock(return_value=["COM1", "COM2"])
+
+    gfr_window._check_device_connections()
+    gfr_window._get_available_ports.assert_not_called()
+
+    gfr_window.device_change_filter._callback()
+    assert gfr_window.device_change_timer.isActive()
+    gfr_window.device_change_timer.stop()
+
+    gfr_window._check_device_connections()
+    gfr_window._get_available_ports.assert_called_once()
+    assert not gfr_window.ports_dirty
+
+
+def test_device_change_filter_ignores_other_events_clean():
+    """Clean test: Events of other platforms are passed through untouched."""
+    callback = MagicMock()
+    device_filter = DeviceChangeFilter(callback)
+
+    assert device_filter.nativeEventFilter(b"xcb_generic_event_t", None) == (False, 0)
+    callback.assert_not_called()
+
+
+def test_combo_selection_keeps_items_functional(gfr_window):
+    """Functional test: Changing the selection does not rebuild the port lists."""
+    gfr_window.combo_port_1.setCurrentText("COM2")
+
+    with patch.object(gfr_window.combo_port_1, "clear") as mock_clear, patch.object(
+        gfr_window.combo_port_1, "insertItem"
+    ) as mock_insert:
+        gfr_window._on_combo_changed()
+        mock_clear.assert_not_called()
+        mock_insert.assert_not_called()
+
+    assert gfr_window.combo_port_1.currentText() == "COM2"
+
+
+def test_combo_update_skipped_when_unchanged_functional(gfr_window):
+    """Functional test: Repeated updates with the same selections and ports do nothing."""
+    gfr_window._update_combo_boxes()
+
+    with patch.object(gfr_window, "_sync_combo_items") as mock_sync:
+        gfr_window._update_combo_boxes()
+        mock_sync.assert_not_called()
+
+        gfr_window._update_combo_boxes(initial=True)
+        assert mock_sync.call_count == 2
+
+
+def test_log_messages_batched_functional(gfr_window):
+    """Functional test: Log messages reach the console in one batch on flush."""
+    gfr_window.log_file_path = None
+    gfr_window.log_console.clear()
+
+    GFRControlWindow._log_message(gfr_window, "Первое сообщение")
+    GFRControlWindow._log_message(gfr_window, "Второе сообщение")
+    assert gfr_window.log_console.toPlainText() == ""
+
+    with patch.object(
+        gfr_window.log_console, "append", wraps=gfr_window.log_console.append
+    ) as mock_append:
+        gfr_window._flush_log()
+        gfr_window._flush_log()
+        mock_append.assert_called_once()
+
+    lines = gfr_window.log_console.toPlainText().splitlines()
+    assert len(lines) == 2
+    assert lines[0].endswith("Первое сообщение")
+    assert lines[1].endswith("Второе сообщение")
+
+
 # ============================================================================
 # Integration Tests
 # ============================================================================
@@ -461,6 +593,30 @@ def test_gfr_relay_integration(gfr_window, mock_gfr_controller, mock_relay_contr
     mock_gfr_controller.TurnOn.assert_not_called()
 
 
+def test_open_connections_in_background_integration(
+    qapp, gfr_window, mock_gfr_controller, mock_relay_controller
+):
+    """Integration test: Devices are turned on without blocking the GUI thread."""
+    gfr_window.combo_port_1.setCurrentText("COM1")
+    gfr_window.combo_port_2.setCurrentText("COM2")
+    gfr_window.toggle_gfr_button.setChecked(True)
+
+    gfr_window._open_connections()
+    assert not gfr_window.toggle_gfr_button.isEnabled()
+
+    # Wait for the connector thread to report back
+    deadline = time.time() + 5
+    while gfr_window.device_connector_thread is not None and time.time() < deadline:
+        qapp.processEvents()
+
+    assert gfr_window.device_connector_thread is None
+    assert gfr_window.toggle_gfr_button.isEnabled()
+    mock_relay_controller.TurnOn.assert_called_once()
+    mock_gfr_controller.TurnOn.assert_called_once()
+    assert gfr_window.toggle_gfr_button.text() == "Выключить РРГ"
+    assert gfr_window.flow_poller_thread is not None
+
+
 def test_graph_updates_integration(gfr_window, mock_gfr_controller):
     """Integration test: Test graph updates when data changes."""
     # Set up a sequence of flow values
@@ -474,11 +630,15 @@ def test_graph_updates_integration(gfr_window, mock_gfr_controller):
     mock_gfr_controller.IsDisconnected.return_value = False
     gfr_window.toggle_gfr_button.setChecked(True)
 
+    # Poll in the test thread, so the signals are delivered directly
+    poller = GFRPoller(mock_gfr_controller)
+    poller.flow_measured.connect(gfr_window._on_flow_measured)
+
     # Patch update_plot_visualization to prevent GUI updates
     with patch.object(gfr_window, "_update_plot_visualization"):
         # Call the update method multiple times
         for _ in range(3):
-            gfr_window._update_graph()
+            poller.poll()
 
     # Verify the data was added to the flow data
     assert len(gfr_window.flow_data) == 3
@@ -487,6 +647,201 @@ def test_graph_updates_integration(gfr_window, mock_gfr_controller):
     assert gfr_window.flow_data[2][1] == 30
 
 
+def test_graph_render_throttling_integration(gfr_window):
+    """Integration test: The graph is redrawn on the render timer, not per measurement."""
+    gfr_window.toggle_gfr_button.setChecked(True)
+
+    for flow in (10.0, 20.0):
+        gfr_window._on_flow_measured(flow, time.monotonic())
+
+    gfr_window._update_plot_visualization.assert_not_called()
+    assert gfr_window.plot_dirty
+
+    gfr_window._render_graph()
+    gfr_window._render_graph()  # Nothing new to draw
+    gfr_window._update_plot_visualization.assert_called_once()
+    assert not gfr_window.plot_dirty
+
+    # The redraw interval is chosen by the user
+    gfr_window.render_interval_spin_box.setValue(300)
+    assert gfr_window.render_timer.interval() == 300
+
+    # Turning the GFR on (which reloads the config) keeps the user's choice
+    gfr_window.config_loader.load_config.return_value = {"render_interval": 500}
+    gfr_window._load_config_data()
+    assert gfr_window.render_timer.interval() == 300
+
+    # The configured value is the initial one
+    assert gfr_window._load_render_interval() == 500
+
+
+def test_flow_poller_signals_integration(mock_gfr_controller):
+    """Integration test: The poller reports errors and lost connections separately."""
+    poller = GFRPoller(mock_gfr_controller)
+    measured, failed, lost = MagicMock(), MagicMock(), MagicMock()
+    poller.flow_measured.connect(measured)
+    poller.poll_failed.connect(failed)
+    poller.connection_lost.connect(lost)
+
+    mock_gfr_controller.GetFlow.side_effect = [
+        (MODBUS_OK, 12.5),
+        (MODBUS_ERROR, 0),
+        Exception("Port closed"),
+    ]
+    for _ in range(3):
+        poller.poll()
+
+    measured.assert_called_once()
+    assert measured.call_args[0][0] == 12.5
+    failed.assert_called_once()
+    lost.assert_called_once()
+
+    # Nothing is read while the GFR is disconnected
+    mock_gfr_controller.IsDisconnected.return_value = True
+    poller.poll()
+    assert mock_gfr_controller.GetFlow.call_count == 3
+
+
+def test_flow_poller_thread_lifecycle_integration(qapp, gfr_window, mock_gfr_controller):
+    """Integration test: Flow is read in the poller thread while the GFR is on."""
+    gfr_window.toggle_gfr_button.setChecked(True)
+    gfr_window.render_timer.stop()  # As after closing the connections on a failure
+    assert not gfr_window.graph_timer.isActive()
+    gfr_window._start_flow_poller()
+    assert gfr_window.flow_poller_thread.isRunning()
+    assert gfr_window.graph_timer.isActive()
+    assert gfr_window.render_timer.isActive()
+    assert gfr_window.stall_check_timer.isActive()
+
+    with patch.object(gfr_window, "_update_plot_visualization"):
+        gfr_window._update_graph()
+
+        # Wait for the measurement to come back to the GUI thread
+        deadline = time.time() + 5
+        while not gfr_window.flow_data and time.time() < deadline:
+            qapp.processEvents()
+
+    assert gfr_window.flow_data[0][1] == 42.0
+
+    # Requests are not queued behind a read that is still in progress
+    gfr_window.flow_poll_pending = True
+    with patch.object(gfr_window, "_flow_poll_requested") as mock_request:
+        gfr_window._update_graph()
+        mock_request.emit.assert_not_called()
+    gfr_window.flow_poll_pending = False
+
+    thread = gfr_window.flow_poller_thread
+    gfr_window._stop_flow_poller()
+    assert thread.isFinished()
+    assert gfr_window.flow_poller_thread is None
+    assert not gfr_window.graph_timer.isActive()
+    assert not gfr_window.stall_check_timer.isActive()
+
+
+def test_flow_buffer_plot_data_clean(gfr_window):
+    """Clean test: Flow history grows past its capacity and gaps break the line."""
+    points = [(i * 0.01, float(i)) for i in range(FlowBuffer.INITIAL_CAPACITY + 1)]
+    points.append((points[-1][0] + 1.0, 0.0))  # Long pause before the last point
+
+    set_flow_points(gfr_window, points)
+    assert isinstance(gfr_window.flow_data, FlowBuffer)
+    assert gfr_window.flow_data == points
+    assert gfr_window.flow_data[-1] == points[-1]
+
+    GFRControlWindow._update_plot_visualization(gfr_window)
+
+    times, flows = gfr_window.line.get_data()
+    assert len(times) == len(points) + 1
+    assert np.isnan(times[-2]) and np.isnan(flows[-2])
+    assert gfr_window.ax.get_xlim()[1] >= points[-1][0]
+
+    gfr_window._clear_graph()
+    assert gfr_window.flow_data == []
+
+
+def test_flow_buffer_max_size_clean():
+    """Clean test: A bounded buffer keeps only the most recent points."""
+    buffer = FlowBuffer(max_size=3)
+    for i in range(FlowBuffer.INITIAL_CAPACITY * 3):
+        buffer.append((float(i), float(-i)))
+
+    last = FlowBuffer.INITIAL_CAPACITY * 3 - 1
+    assert len(buffer) == 3
+    assert buffer == [(last - 2, 2 - last), (last - 1, 1 - last), (last, -last)]
+    assert buffer.times.flags["C_CONTIGUOUS"]
+
+
+def test_csv_export_keeps_full_history_functional(gfr_window, tmp_path, monkeypatch):
+    """Functional test: Points dropped from the graph are still exported to CSV."""
+    monkeypatch.chdir(tmp_path)
+    points = [(0.1, 10), (0.2, 20), (0.3, 30), (0.4, 40), (0.5, 50)]
+
+    gfr_window.flow_data = FlowBuffer(max_size=3)
+    set_flow_points(gfr_window, points)
+    assert gfr_window.flow_data == points[-3:]
+
+    with patch("PyQt5.QtWidgets.QMessageBox.information"), patch.object(
+        gfr_window, "_log_message"
+    ):
+        gfr_window._save_data_to_csv()
+
+    (csv_file,) = tmp_path.glob("flow_data_*.csv")
+    rows = csv_file.read_text().splitlines()
+    assert rows[0] == "Время [мин],Расход [см3/мин]"
+    assert rows[1:] == [f"{t:.2f},{f:.3f}" for t, f in points]
+
+    # Measurements recorded after the export are still appended to the history
+    gfr_window._record_flow(0.6, 60)
+    gfr_window.flow_history_file.seek(0)
+    assert gfr_window.flow_history_file.read().splitlines()[-1] == "0.60,60.000"
+
+
+def test_flow_history_file_lifetime_functional(gfr_window, temporary_log_dir):
+    """Functional test: The history file is created by the first measurement and closed on exit."""
+    assert gfr_window.flow_history_file is None
+    assert not list(temporary_log_dir.glob("*_flow.csv"))
+
+    gfr_window._record_flow(0.1, 10)
+    (history_path,) = temporary_log_dir.glob("*_flow.csv")
+    # Every measurement is written through right away
+    assert history_path.read_text().splitlines() == [
+        "Время [мин],Расход [см3/мин]",
+        "0.10,10.000",
+    ]
+
+    history_file = gfr_window.flow_history_file
+    gfr_window._prepare_exit()
+    assert history_file.closed
+    assert gfr_window.flow_history_file is None
+
+
+def test_decimate_peaks_clean():
+    """Clean test: Long series are reduced to the extremes per pixel column."""
+    times = np.arange(10, dtype=np.float64)
+    flows = np.array([5, 1, 9, 5, 4, 5, 0, 3, 7, 3], dtype=np.float64)
+
+    kept_times, kept_flows = decimate_peaks(times, flows, 4)
+    assert kept_times.tolist() == [1, 2, 5, 6, 8, 9]  # The last 2 points are kept
+    assert kept_flows.tolist() == [1, 9, 5, 0, 7, 3]
+
+    # Short series are left as they are
+    assert decimate_peaks(times, flows, 2)[0] is times
+
+
+def test_plot_decimates_segments_functional(gfr_window):
+    """Functional test: The window decimates each segment between the gaps separately."""
+    points = [(i * 0.001, float(i % 7)) for i in range(20000)]
+    points.append((points[-1][0] + 1.0, 50.0))
+    set_flow_points(gfr_window, points)
+
+    GFRControlWindow._update_plot_visualization(gfr_window)
+
+    plot_times, plot_flows = gfr_window.line.get_data()
+    assert len(plot_times) < len(points) // 2
+    assert np.nanmax(plot_flows[:-2]) == 6 and np.nanmin(plot_flows) == 0
+    assert np.isnan(plot_times[-2]) and plot_flows[-1] == 50.0
+
+
 def test_config_loading_integration(gfr_window, mock_config_loader):
     """Integration test: Test loading configuration from files."""
     # Set up different configs for relay and GFR
@@ -614,7 +969,7 @@ def test_keyboard_shortcut_gui(qapp, gfr_window):
 
 @pytest.mark.gui
 def test_message_dialog_gui(qapp, gfr_window):
-    gfr_window.flow_data = [(0.1, 10), (0.2, 20), (0.3, 30)]
+    set_flow_points(gfr_window, [(0.1, 10), (0.2, 20), (0.3, 30)])
 
     with patch("datetime.datetime") as mock_datetime:
         mock_datetime.now.return_value.strftime.return_value = "2023-01-01_12-00-00"
@@ -726,7 +1081,7 @@ def test_graph_large_dataset_stress(qapp, gfr_window):
     """Stress test: Test graph performance with a large dataset."""
     # Create a medium-sized dataset (reduced size for faster tests)
     data_points = 1000  # Reduced from 10000 to 1000 to reduce test time
-    gfr_window.flow_data = [(i / 100, i % 100) for i in range(data_points)]
+    set_flow_points(gfr_window, [(i / 100, i % 100) for i in range(data_points)])
 
     # Measure time to update the plot
     start_time = time.time()
@@ -736,7 +1091,7 @@ def test_graph_large_dataset_stress(qapp, gfr_window):
     for i in range(0, data_points, batch_size):
         # Create a subset of data
         subset = gfr_window.flow_data[: i + batch_size]
-        gfr_window.flow_data = subset
+        set_flow_points(gfr_window, subset)
 
         # Update plot with the current subset
         with patch.object(
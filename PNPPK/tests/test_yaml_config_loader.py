@@ -19,6 +19,7 @@ from core.yaml_config_loader import (
     YAMLConfigFileFormatError,
     YAMLConfigLoaderException,
 )
+from core.yaml_config_loader.loader import _read_config_memoized
 
 # Setup logging for performance tests
 logging.basicConfig(
@@ -160,7 +161,7 @@ def test_load_config_empty_file_dirty():
         temp_name = temp.name
 
     try:
-        # Empty file should return None from yaml.safe_load
+        # Empty file should return None from yaml.load
         config = YAMLConfigLoader.load_config(temp_name)
         assert config is None
     finally:
@@ -180,7 +181,7 @@ def test_load_config_permission_error_dirty():
 def test_load_config_unexpected_error_dirty():
     """Dirty test: Handle unexpected errors during loading."""
     with patch("builtins.open", mock_open()):
-        with patch("yaml.safe_load", side_effect=Exception("Unexpected error")):
+        with patch("yaml.load", side_effect=Exception("Unexpected error")):
             with pytest.raises(YAMLConfigLoaderException) as excinfo:
                 YAMLConfigLoader.load_config("some_file.yaml")
 
@@ -340,6 +341,37 @@ def test_exception_hierarchy_functional():
     assert str(format_exception.error) == "Test error"
 
 
+def test_config_cache_functional(valid_yaml_file):
+    """Functional test: Parsed configs are cached until the YAML file changes."""
+    try:
+        YAMLConfigLoader.load_config(valid_yaml_file)
+
+        # The second load does not parse the YAML file
+        with patch("yaml.load") as mock_load:
+            config = YAMLConfigLoader.load_config(valid_yaml_file)
+            mock_load.assert_not_called()
+        assert config["relay"]["baudrate"] == 115200
+
+        # Results are copies, changing one does not affect the next load
+        config["relay"]["baudrate"] = 1
+        config = YAMLConfigLoader.load_config(valid_yaml_file)
+        assert config["relay"]["baudrate"] == 115200
+
+        # Changing the file invalidates the cache
+        YAMLConfigLoader.save_config(valid_yaml_file, {"relay": {"baudrate": 9600}})
+        config = YAMLConfigLoader.load_config(valid_yaml_file)
+        assert config["relay"]["baudrate"] == 9600
+
+        # Saving drops the caches even if the size and mtime stay the same
+        stat = os.stat(valid_yaml_file)
+        YAMLConfigLoader.save_config(valid_yaml_file, {"relay": {"baudrate": 4800}})
+        os.utime(valid_yaml_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        config = YAMLConfigLoader.load_config(valid_yaml_file)
+        assert config["relay"]["baudrate"] == 4800
+    finally:
+        _read_config_memoized.cache_clear()
+
+
 # ============================================================================
 # Integration Tests
 # ============================================================================